@@ -0,0 +1,107 @@
+"""_fake_api.py — In-process stand-ins for the elabapi_python API classes.
+
+Used by the benchmark scripts to measure the app's call paths without a live
+elabFTW.  ``install(n_entries)`` swaps the API classes on the real
+``elabapi_python`` module (as imported by ``utils``) for fakes that keep their
+entries in memory and count every call.
+
+Transfer cost is simulated: each response sleeps ``SECONDS_PER_MB`` per MB of
+body HTML it returns, so list downloads get slower as the team grows, exactly
+like they do against a real server.
+"""
+
+import json
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src" / "elab_app"))
+
+import utils  # noqa: E402
+
+SECONDS_PER_MB = 0.08    # ~100 Mbit/s effective throughput
+BODY_BYTES     = 20_000  # typical body size of an entry with a log table
+
+CALLS = Counter()
+
+
+def _transfer(entries):
+    size = sum(len(e.body or '') for e in entries)
+    time.sleep(SECONDS_PER_MB * size / 1_000_000)
+
+
+class _Store:
+    def __init__(self, n_entries, body_bytes):
+        filler = '<p>%s</p>' % ('x' * max(body_bytes - 7, 0))
+        self.entries = {
+            i: SimpleNamespace(id=i, title=f'Entry {i}', body=filler,
+                               category_title='', fullname='', created_at='',
+                               modified_at='', lastchangeby=1)
+            for i in range(1, n_entries + 1)
+        }
+
+
+class _FakeEntityApi:
+    store = None
+
+    def __init__(self, api_client=None):
+        pass
+
+    def _list(self, limit=15, offset=0, _preload_content=True, **kwargs):
+        entries = list(self.store.entries.values())[offset:offset + limit]
+        _transfer(entries)
+        if not _preload_content:
+            return SimpleNamespace(data=json.dumps([vars(e) for e in entries]))
+        return entries
+
+    def _get(self, id, **kwargs):
+        entry = self.store.entries[id]
+        _transfer([entry])
+        return entry
+
+    def _patch(self, id, body=None, **kwargs):
+        entry = self.store.entries[id]
+        for k, v in (body or {}).items():
+            setattr(entry, k, v)
+        _transfer([entry])
+        return entry
+
+
+class FakeExperimentsApi(_FakeEntityApi):
+    def read_experiments(self, **kwargs):
+        CALLS['GET /experiments'] += 1
+        return self._list(**kwargs)
+
+    def get_experiment(self, id, **kwargs):
+        CALLS['GET /experiments/{id}'] += 1
+        return self._get(id, **kwargs)
+
+    def patch_experiment(self, id, body=None, **kwargs):
+        CALLS['PATCH /experiments/{id}'] += 1
+        return self._patch(id, body, **kwargs)
+
+
+class FakeItemsApi(_FakeEntityApi):
+    def read_items(self, **kwargs):
+        CALLS['GET /items'] += 1
+        return self._list(**kwargs)
+
+    def get_item(self, id, **kwargs):
+        CALLS['GET /items/{id}'] += 1
+        return self._get(id, **kwargs)
+
+    def patch_item(self, id, body=None, **kwargs):
+        CALLS['PATCH /items/{id}'] += 1
+        return self._patch(id, body, **kwargs)
+
+
+def install(n_entries, body_bytes=BODY_BYTES):
+    """Replace the elabapi_python entity APIs seen by ``utils`` with fakes."""
+    FakeExperimentsApi.store = _Store(n_entries, body_bytes)
+    FakeItemsApi.store = _Store(n_entries, body_bytes)
+    utils.elabapi_python.ExperimentsApi = FakeExperimentsApi
+    utils.elabapi_python.ItemsApi = FakeItemsApi
+    CALLS.clear()
+    return utils
@@ -0,0 +1,36 @@
+"""bench_append.py — Append latency versus number of entries in the team.
+
+Run from the repository root:
+
+    python benchmarks/bench_append.py
+
+For each team size the script appends a handful of log lines to one
+experiment through ``utils.append_to_experiment`` and prints the median
+latency and the API calls made per append.  Because the entry is read by id,
+latency should stay flat as the number of entries grows.
+"""
+
+import statistics
+import time
+
+import _fake_api
+
+SIZES   = [10, 100, 1_000, 10_000]
+REPEATS = 5
+
+
+def main():
+    print(f"{'entries':>8}  {'median ms':>10}  calls/append")
+    for n in SIZES:
+        utils = _fake_api.install(n)
+        timings = []
+        for i in range(REPEATS):
+            t0 = time.perf_counter()
+            utils.append_to_experiment(None, 1, f'benchmark line {i}', initials='bench')
+            timings.append(time.perf_counter() - t0)
+        calls = {k: v / REPEATS for k, v in _fake_api.CALLS.items()}
+        print(f"{n:>8}  {statistics.median(timings) * 1000:>10.2f}  {calls}")
+
+
+if __name__ == "__main__":
+    main()
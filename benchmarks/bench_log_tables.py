@@ -0,0 +1,83 @@
+"""bench_log_tables.py — Log-table locator scaling on large entry bodies.
+
+Run from the repository root:
+
+    python benchmarks/bench_log_tables.py
+
+Builds synthetic bodies from 10 KB to 10 MB made of many small tables (every
+other one an elab-app log table) and times ``utils._find_all_log_tables`` and
+the row parse of ``utils.LogTable`` (uncached).  The original locator, which lowered
+the whole body on every iteration, is timed alongside for bodies up to
+``REFERENCE_MAX`` bytes — beyond that it takes minutes.
+"""
+
+import time
+
+import _fake_api
+
+utils = _fake_api.utils
+
+SIZES         = [10_000, 100_000, 1_000_000, 10_000_000]
+REFERENCE_MAX = 1_000_000
+ROWS_PER_TABLE = 5
+
+
+def _reference_find_all_log_tables(html):
+    """The original implementation, kept here for comparison."""
+    results = []
+    pos = 0
+    html = html or ''
+    while True:
+        t_start = html.lower().find('<table', pos)
+        if t_start == -1:
+            break
+        t_end = html.lower().find('</table>', t_start)
+        if t_end == -1:
+            break
+        t_end += len('</table>')
+        if utils._LOG_SIGNATURE in html[t_start:t_end]:
+            results.append((t_start, t_end))
+        pos = t_end
+    return results
+
+
+def synthetic_body(size):
+    """Return a body of roughly *size* bytes made of alternating log/plain tables."""
+    rows = [('2026-01-01T12:%02d:00' % (i % 60), 'line %d' % i, 'bench', 'v3.1')
+            for i in range(ROWS_PER_TABLE)]
+    log_table = utils.build_log_table(rows)
+    plain_table = '<table><tr><td>sample</td><td>value</td></tr></table>'
+    chunk = '<p>notes</p>\n' + log_table + '\n<p>more notes</p>\n' + plain_table + '\n'
+    return chunk * max(1, size // len(chunk))
+
+
+def _parse_rows(body):
+    return utils.LogTable(body).rows   # a fresh LogTable, so nothing comes from the cache
+
+
+def _time(fn, body, repeats=3):
+    best = float('inf')
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn(body)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    print(f"{'body size':>10}  {'tables':>7}  {'locate ms':>10}  {'with rows ms':>13}  {'reference ms':>13}")
+    for size in SIZES:
+        body = synthetic_body(size)
+        n_tables = len(utils._find_all_log_tables(body))
+        t_new = _time(utils._find_all_log_tables, body)
+        t_rows = _time(_parse_rows, body)
+        if size <= REFERENCE_MAX:
+            assert _reference_find_all_log_tables(body) == utils._find_all_log_tables(body)
+            t_ref = '%13.2f' % (_time(_reference_find_all_log_tables, body, repeats=1) * 1000)
+        else:
+            t_ref = '%13s' % 'skipped'
+        print(f"{len(body):>10}  {n_tables:>7}  {t_new * 1000:>10.2f}  {t_rows * 1000:>13.2f}  {t_ref}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,424 @@
+"""fake_elab.py — Local stand-in for the elabFTW REST API (v2).
+
+Serves the endpoints the app uses from an in-memory store over real HTTP, so
+the app's code paths — including elabapi_python's (de)serialisation and the
+connection pool — can be exercised without a live elabFTW:
+
+    from fake_elab import FakeElab
+    with FakeElab(n_entries=100, latency=0.02) as server:
+        client = server.api_client()
+        ...
+
+or, as a standalone server for the Streamlit app or the CLI:
+
+    python benchmarks/fake_elab.py --entries 1000 --body-bytes 20000 --latency 0.05
+
+(point the app at it with ``elab_host = "http://127.0.0.1:8765/api/v2"`` in
+config.toml; any API key is accepted).
+
+Implemented: experiments and items (list, read, create, patch), uploads (list,
+create, read, binary download), items/experiments links, users (me, by id,
+list), teams, experiment and resource categories and items types.
+
+Cost model: every request waits ``latency`` seconds, plus ``seconds_per_mb``
+per MB of request and response payload.  Request counts per endpoint are kept
+in ``server.calls``.
+"""
+
+import argparse
+import datetime
+import email.parser
+import email.policy
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+TEAMS = [{'id': 1, 'name': 'Fake Lab'}, {'id': 2, 'name': 'Second Team'}]
+EXPERIMENT_CATEGORIES = [{'id': 1, 'title': 'Measurement', 'color': '29aeb9'},
+                         {'id': 2, 'title': 'Synthesis', 'color': 'e6b400'}]
+ITEMS_TYPES = [{'id': 1, 'title': 'Sample', 'color': '32a100'},
+               {'id': 2, 'title': 'Instrument', 'color': 'c0392b'}]
+
+
+def _now():
+    # elabFTW reports timestamps with second resolution
+    return datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+
+class _Store:
+    """Experiments, items, uploads and users, guarded by one lock."""
+
+    def __init__(self, n_entries, body_bytes, n_users):
+        self.lock = threading.Lock()
+        self.entries = {'experiments': {}, 'items': {}}
+        self.next_id = {'experiments': 1, 'items': 1}
+        self.uploads = {}     # (entity_type, id) -> {upload id: (record, data)}
+        self.next_upload = 1
+        self.users = {
+            uid: {'userid': uid, 'firstname': f'User{uid}', 'lastname': 'Fake',
+                  'fullname': f'User{uid} Fake', 'initials': f'U{uid}',
+                  'email': f'user{uid}@example.org', 'orcid': None, 'sig_pubkey': None}
+            for uid in range(1, n_users + 1)
+        }
+        filler = '<p>%s</p>' % ('x' * max(body_bytes - 7, 0)) if body_bytes else ''
+        for entity_type in self.entries:
+            for _ in range(n_entries):
+                self.create(entity_type, body=filler)
+
+    def create(self, entity_type, title='Untitled', body='', category=None):
+        eid = self.next_id[entity_type]
+        self.next_id[entity_type] += 1
+        now = _now()
+        self.entries[entity_type][eid] = {
+            'id': eid, 'title': f'{title} {eid}' if title == 'Untitled' else title,
+            'body': body, 'category': category, 'category_title': '',
+            'created_at': now, 'modified_at': now, 'fullname': 'User1 Fake',
+            'userid': 1, 'lastchangeby': 1, 'tags': None,
+            'items_links': [], 'experiments_links': [],
+        }
+        return eid
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'   # keep-alive, like a real server
+    disable_nagle_algorithm = True  # headers and body go out as separate writes
+
+    def log_message(self, *args):
+        pass
+
+    # ── plumbing ──────────────────────────────────────────────────────────────
+
+    def _send(self, status, payload=None, headers=(), raw=None):
+        if raw is not None:
+            data, ctype = raw, 'application/octet-stream'
+        else:
+            data, ctype = (b'', None) if payload is None else (json.dumps(payload).encode(), 'application/json')
+        self.server.fake._transfer(len(data))
+        self.send_response(status)
+        if ctype:
+            self.send_header('Content-Type', ctype)
+        self.send_header('Content-Length', str(len(data)))
+        for k, v in headers:
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _not_found(self):
+        return self._send(404, {'code': 404, 'message': 'Nothing to show with this id'})
+
+    def _read_body(self):
+        n = int(self.headers.get('Content-Length') or 0)
+        data = self.rfile.read(n) if n else b''
+        self.server.fake._transfer(len(data))
+        return data
+
+    def _json_body(self):
+        data = self._read_body()
+        return json.loads(data) if data else {}
+
+    def _form_body(self):
+        """Parse a multipart/form-data body into {name: (filename, bytes)}."""
+        data = self._read_body()
+        head = f"Content-Type: {self.headers.get('Content-Type')}\r\n\r\n".encode()
+        msg = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(head + data)
+        fields = {}
+        for part in msg.iter_parts():
+            name = part.get_param('name', header='content-disposition')
+            fields[name] = (part.get_filename(), part.get_payload(decode=True))
+        return fields
+
+    def _route(self, method):
+        server = self.server.fake
+        time.sleep(server.latency)
+        url = urlsplit(self.path)
+        path = url.path[len(server.prefix):] if url.path.startswith(server.prefix) else url.path
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        for verb, pattern, handler, template in server.routes:
+            m = pattern.fullmatch(path)
+            if m and verb == method:
+                with server.lock:
+                    server.calls[f'{method} {template}'] += 1
+                return handler(self, query, *m.groups())
+        self._read_body()
+        return self._send(404, {'code': 404, 'message': f'no route for {method} {path}'})
+
+    def do_GET(self):
+        self._route('GET')
+
+    def do_POST(self):
+        self._route('POST')
+
+    def do_PATCH(self):
+        self._route('PATCH')
+
+    def do_DELETE(self):
+        self._route('DELETE')
+
+    # ── experiments / items ───────────────────────────────────────────────────
+
+    def list_entries(self, query, entity_type):
+        store = self.server.fake.store
+        limit = int(query.get('limit', 15))
+        offset = int(query.get('offset', 0))
+        with store.lock:
+            entries = list(store.entries[entity_type].values())
+        if query.get('order') == 'lastchange':
+            entries.sort(key=lambda e: e['modified_at'], reverse=query.get('sort') != 'asc')
+        self._send(200, entries[offset:offset + limit])
+
+    def get_entry(self, query, entity_type, eid):
+        store = self.server.fake.store
+        with store.lock:
+            entry = store.entries[entity_type].get(int(eid))
+            entry = dict(entry) if entry else None
+        if entry is None:
+            return self._not_found()
+        self._send(200, entry)
+
+    def patch_entry(self, query, entity_type, eid):
+        store = self.server.fake.store
+        fields = self._json_body()
+        with store.lock:
+            entry = store.entries[entity_type].get(int(eid))
+            if entry is None:
+                return self._not_found()
+            entry.update(fields)
+            entry['modified_at'] = _now()
+            entry = dict(entry)
+        self._send(200, entry)
+
+    def post_entry(self, query, entity_type):
+        store = self.server.fake.store
+        fields = self._json_body()
+        with store.lock:
+            eid = store.create(entity_type, category=fields.get('category'))
+        location = f'{self.server.fake.url}/{entity_type}/{eid}'
+        self._send(201, None, headers=[('Location', location)])
+
+    # ── uploads ───────────────────────────────────────────────────────────────
+
+    def list_uploads(self, query, entity_type, eid):
+        store = self.server.fake.store
+        with store.lock:
+            records = [rec for rec, _ in store.uploads.get((entity_type, int(eid)), {}).values()]
+        self._send(200, records)
+
+    def get_upload(self, query, entity_type, eid, subid):
+        store = self.server.fake.store
+        with store.lock:
+            found = store.uploads.get((entity_type, int(eid)), {}).get(int(subid))
+        if found is None:
+            return self._not_found()
+        record, data = found
+        if query.get('format') == 'binary':
+            return self._send(200, raw=data)
+        self._send(200, record)
+
+    def post_upload(self, query, entity_type, eid):
+        store = self.server.fake.store
+        fields = self._form_body()
+        filename, data = fields.get('file', ('upload', b''))
+        comment = (fields.get('comment', (None, b''))[1] or b'').decode()
+        with store.lock:
+            if int(eid) not in store.entries[entity_type]:
+                return self._not_found()
+            uid = store.next_upload
+            store.next_upload += 1
+            record = {
+                'id': uid, 'real_name': filename, 'long_name': f'fa/{uid:040x}',
+                'comment': comment, 'item_id': int(eid), 'userid': 1, 'type': entity_type,
+                'created_at': _now(), 'hash': hashlib.sha256(data).hexdigest(),
+                'hash_algorithm': 'sha256', 'storage': 1, 'filesize': len(data),
+                'state': 1, 'immutable': 0, 'fullname': 'User1 Fake',
+            }
+            store.uploads.setdefault((entity_type, int(eid)), {})[uid] = (record, data)
+        location = f'{self.server.fake.url}/{entity_type}/{eid}/uploads/{uid}'
+        self._send(201, None, headers=[('Location', location)])
+
+    # ── links ─────────────────────────────────────────────────────────────────
+
+    def list_links(self, query, entity_type, eid, kind):
+        store = self.server.fake.store
+        with store.lock:
+            entry = store.entries[entity_type].get(int(eid))
+            links = list(entry[kind]) if entry else None
+        if links is None:
+            return self._not_found()
+        self._send(200, links)
+
+    def post_link(self, query, entity_type, eid, kind, target):
+        store = self.server.fake.store
+        self._read_body()
+        target_type = 'items' if kind == 'items_links' else 'experiments'
+        with store.lock:
+            entry = store.entries[entity_type].get(int(eid))
+            linked = store.entries[target_type].get(int(target))
+            if entry is None or linked is None:
+                return self._not_found()
+            if all(l['entityid'] != int(target) for l in entry[kind]):
+                entry[kind].append({'entityid': int(target), 'title': linked['title'],
+                                    'category_title': linked['category_title']})
+        self._send(201, None)
+
+    # ── users, teams, categories ──────────────────────────────────────────────
+
+    def get_user(self, query, uid):
+        store = self.server.fake.store
+        uid = 1 if uid == 'me' else int(uid)
+        with store.lock:
+            user = store.users.get(uid)
+        if user is None:
+            return self._not_found()
+        self._send(200, dict(user, teams=TEAMS, team=TEAMS[0]['id']))
+
+    def list_users(self, query):
+        store = self.server.fake.store
+        with store.lock:
+            users = list(store.users.values())
+        self._send(200, users)
+
+    def list_teams(self, query):
+        self._send(200, TEAMS)
+
+    def get_team(self, query, tid):
+        team = next((t for t in TEAMS if t['id'] == int(tid)), None)
+        if team is None:
+            return self._not_found()
+        self._send(200, team)
+
+    def list_experiment_categories(self, query, tid):
+        self._send(200, EXPERIMENT_CATEGORIES)
+
+    def list_resource_categories(self, query, tid):
+        self._send(200, ITEMS_TYPES)
+
+    def list_items_types(self, query):
+        self._send(200, ITEMS_TYPES)
+
+
+# path templates as in elabapi_python; placeholders become regex groups
+_PLACEHOLDERS = {
+    'entity_type': r'(experiments|items)',
+    'id':          r'(\d+)',
+    'subid':       r'(\d+)',
+    'user':        r'(me|\d+)',
+    'links':       r'(items_links|experiments_links)',
+}
+
+_ROUTES = [
+    ('GET',   '/{entity_type}',                       _Handler.list_entries),
+    ('POST',  '/{entity_type}',                       _Handler.post_entry),
+    ('GET',   '/{entity_type}/{id}',                  _Handler.get_entry),
+    ('PATCH', '/{entity_type}/{id}',                  _Handler.patch_entry),
+    ('GET',   '/{entity_type}/{id}/uploads',          _Handler.list_uploads),
+    ('POST',  '/{entity_type}/{id}/uploads',          _Handler.post_upload),
+    ('GET',   '/{entity_type}/{id}/uploads/{subid}',  _Handler.get_upload),
+    ('GET',   '/{entity_type}/{id}/{links}',          _Handler.list_links),
+    ('POST',  '/{entity_type}/{id}/{links}/{subid}',  _Handler.post_link),
+    ('GET',   '/users',                               _Handler.list_users),
+    ('GET',   '/users/{user}',                        _Handler.get_user),
+    ('GET',   '/teams',                               _Handler.list_teams),
+    ('GET',   '/teams/{id}',                          _Handler.get_team),
+    ('GET',   '/teams/{id}/experiments_categories',   _Handler.list_experiment_categories),
+    ('GET',   '/teams/{id}/resources_categories',     _Handler.list_resource_categories),
+    ('GET',   '/items_types',                         _Handler.list_items_types),
+]
+
+
+def _compile(template):
+    return re.compile(re.sub(r'\{(\w+)\}', lambda m: _PLACEHOLDERS[m.group(1)], template))
+
+
+class FakeElab:
+    """Threaded fake elabFTW server on localhost; use as a context manager.
+
+    Keyword arguments:
+    n_entries -- experiments and items created at start (each)
+    body_bytes -- size of the filler body of every entry
+    latency -- seconds every request waits before it is answered
+    seconds_per_mb -- extra wait per MB of request and response payload
+    n_users -- users in the directory (GET /users)
+    port -- port to listen on (default: a free one)
+    """
+
+    prefix = '/api/v2'
+
+    def __init__(self, n_entries=10, body_bytes=0, latency=0.0, seconds_per_mb=0.0,
+                 n_users=20, port=0):
+        self.store = _Store(n_entries, body_bytes, n_users)
+        self.latency = latency
+        self.seconds_per_mb = seconds_per_mb
+        self.calls = Counter()
+        self.lock = threading.Lock()
+        self.routes = [(method, _compile(template), handler, template)
+                       for method, template, handler in _ROUTES]
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.fake = self
+        self._thread = None
+
+    def _transfer(self, nbytes):
+        if self.seconds_per_mb:
+            time.sleep(self.seconds_per_mb * nbytes / 1_000_000)
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f'http://{host}:{port}{self.prefix}'
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def api_client(self, api_key='fake-key'):
+        """Return an elabapi_python ApiClient pointed at this server."""
+        import elabapi_python
+        cfg = elabapi_python.Configuration()
+        cfg.api_key['api_key'] = api_key
+        cfg.api_key_prefix['api_key'] = 'Authorization'
+        cfg.host = self.url
+        cfg.verify_ssl = False
+        client = elabapi_python.ApiClient(cfg)
+        client.set_default_header(header_name='Authorization', header_value=api_key)
+        return client
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a local fake elabFTW API server.')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--entries', type=int, default=100, help='experiments and items (each)')
+    parser.add_argument('--body-bytes', type=int, default=0, help='filler body size per entry')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds per request')
+    parser.add_argument('--seconds-per-mb', type=float, default=0.0, help='transfer cost per MB')
+    parser.add_argument('--users', type=int, default=20)
+    args = parser.parse_args()
+
+    server = FakeElab(n_entries=args.entries, body_bytes=args.body_bytes, latency=args.latency,
+                      seconds_per_mb=args.seconds_per_mb, n_users=args.users, port=args.port)
+    print(f'fake elabFTW listening on {server.url} — Ctrl+C to stop')
+    server.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,328 @@
+"""run.py — Benchmark suite for the log-table engine and the API call paths.
+
+Run from the repository root:
+
+    python benchmarks/run.py                          # full suite, saved as JSON
+    python benchmarks/run.py --max-rows 1000 --quick  # smoke run
+    python benchmarks/run.py --compare benchmarks/results/v3.1.json
+
+Two groups of cases, each on synthetic bodies with 10 to 100 000 log rows:
+
+* engine — parse_log_rows, _find_all_log_tables, build_log_table,
+  check_log_compatibility and _consolidate (one new head row, which takes the
+  splice path, and one out-of-order row, which forces the full merge); and
+  the catalogue search index (search.py) over that many entries: building
+  it, prefix and fuzzy queries, and re-syncing after one entry changed;
+* api — user actions (append one row, bulk-append a transcript, open an
+  entry, load the catalogue, create an experiment) against a local fake
+  elabFTW (fake_elab.py) over HTTP, with ``--latency`` per request.
+
+Before the engine cases run, _consolidate is checked against a full merge for
+one new head row, on an up-to-date table (which is spliced) and on a v2.x
+table (which must be rebuilt); the run stops if they differ.
+
+Every case reports the median time per operation, the peak memory allocated
+during one operation (tracemalloc) and, for api cases, the HTTP round trips
+per action.  The LogTable cache is cleared before every engine operation, so
+the numbers are for a body seen for the first time.
+
+Results are written to ``benchmarks/results/<app version>.json`` (or
+``--save``).  ``--compare`` prints the ratio against an earlier result file
+and flags cases that got more than ``REGRESSION_RATIO`` slower, allocate
+that much more, or make more round trips, so regressions stay visible
+across releases.
+"""
+
+import argparse
+import datetime
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+_HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(_HERE.parent / "src" / "elab_app"))
+
+import streamlit as st  # noqa: E402
+import utils  # noqa: E402
+from search import SearchIndex, terms  # noqa: E402
+from version import LOG_SCHEMA_VERSION  # noqa: E402
+from fake_elab import FakeElab  # noqa: E402
+
+ROW_COUNTS        = [10, 100, 1_000, 10_000, 100_000]
+MIN_TIME          = 0.3    # seconds of timed runs per engine case
+MAX_REPEATS       = 200
+API_REPEATS       = 5
+BULK_ROWS         = 50     # rows in the simulated transcript upload
+REGRESSION_RATIO  = 1.25
+RESULTS_DIR       = _HERE / "results"
+
+
+# ── Synthetic data ────────────────────────────────────────────────────────────
+
+def synthetic_rows(n):
+    """n log rows, newest first, one minute apart."""
+    start = datetime.datetime(2026, 1, 1)
+    return [((start + datetime.timedelta(minutes=n - i)).strftime('%Y-%m-%dT%H:%M:%S'),
+             f'<p>measurement {i}: sample rotated by {i % 360} deg</p>', 'bench', LOG_SCHEMA_VERSION)
+            for i in range(n)]
+
+
+def synthetic_body(n):
+    return '<p>Experiment notes</p>\n' + utils.build_log_table(synthetic_rows(n)) + '\n<p>end</p>'
+
+
+def legacy_body(n):
+    """A v2.x log table: 3 columns, no identifier row."""
+    header = '<tr><th>ISO time<br>(ISO 8601)</th><th>Log<br>(newest to oldest)</th><th>Initials</th></tr>'
+    trs = ['<tr><td>%s</td><td>%s</td><td>%s</td></tr>' % row[:3] for row in synthetic_rows(n)]
+    return '<p>Experiment notes</p>\n<table>\n%s\n</table>\n<p>end</p>' % '\n'.join([header] + trs)
+
+
+def synthetic_catalogue(n, rows_per_entry=20):
+    """n EntrySummary records drawn from a 5 000-word vocabulary (seeded, reproducible)."""
+    rng = random.Random(n)
+    syllables = ['an', 'ne', 'al', 'ox', 'id', 'ti', 'ta', 'ni', 'um', 'ce', 'ri', 'sa', 'mp', 'le', 'xr', 'dz']
+    vocab = sorted({''.join(rng.choice(syllables) for _ in range(rng.randint(2, 5))) for _ in range(5000)})
+    categories = ['Synthesis', 'XRD', 'Annealing', 'Beamtime', 'Characterisation']
+    return [utils.EntrySummary(
+        i, ' '.join(rng.choice(vocab) for _ in range(4)) + f' {i}', rng.choice(categories),
+        f'2026-01-01 00:{i % 60:02d}:00', tuple(rng.sample(vocab, 2)),
+        frozenset(w for _ in range(rows_per_entry) for w in terms(' '.join(rng.sample(vocab, 6))))
+    ) for i in range(1, n + 1)]
+
+
+# ── Correctness ───────────────────────────────────────────────────────────────
+
+def _full_merge(body, new_row):
+    """Reference result of appending new_row: parse the table, merge, rebuild it."""
+    (s, e), = utils._find_all_log_tables(body)
+    rows, _, _ = utils._merge_and_sort(utils.parse_log_rows(body[s:e]), [new_row])
+    return body[:s] + utils.build_log_table(rows) + body[e:]
+
+
+def check_splice(row_counts):
+    """Check that _consolidate gives the full-merge result for one new head row,
+    both on an up-to-date table (spliced) and on a v2.x table (merged).
+    Returns the names of the failing cases."""
+    head_row = ('2027-01-01T00:00:00', '<p>new head row</p>', 'bench', LOG_SCHEMA_VERSION)
+    failures = []
+    for n in row_counts:
+        for kind, body in (('current', synthetic_body(n)), ('v2.x', legacy_body(n))):
+            _clear_log_cache()
+            if utils._consolidate(body, [head_row])[0] != _full_merge(body, head_row):
+                failures.append(f'splice {kind} {n}')
+    return failures
+
+
+# ── Measurement ───────────────────────────────────────────────────────────────
+
+def _measure(op, setup=None, repeats=None):
+    """Return (median seconds, peak bytes, timed runs) for op(); setup() runs before each call."""
+    if setup:
+        setup()
+    tracemalloc.start()
+    op()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    timings = []
+    budget_end = time.perf_counter() + MIN_TIME
+    while True:
+        if setup:
+            setup()
+        t0 = time.perf_counter()
+        op()
+        timings.append(time.perf_counter() - t0)
+        if repeats is not None:
+            if len(timings) >= repeats:
+                break
+        elif time.perf_counter() >= budget_end or len(timings) >= MAX_REPEATS:
+            break
+    return statistics.median(timings), peak, len(timings)
+
+
+def _clear_log_cache():
+    with utils._log_table_lock:
+        utils._LOG_TABLE_CACHE.clear()
+
+
+def engine_cases(n):
+    body = synthetic_body(n)
+    rows = utils.parse_log_rows(body)
+    head_row = ('2027-01-01T00:00:00', '<p>new head row</p>', 'bench', LOG_SCHEMA_VERSION)
+    old_row = ('2025-06-01T00:00:00', '<p>late entry</p>', 'bench', LOG_SCHEMA_VERSION)
+    return [
+        ('parse_log_rows',            lambda: utils.parse_log_rows(body)),
+        ('_find_all_log_tables',      lambda: utils._find_all_log_tables(body)),
+        ('build_log_table',           lambda: utils.build_log_table(rows)),
+        ('check_log_compatibility',   lambda: utils.check_log_compatibility(body)),
+        ('_consolidate (head row)',   lambda: utils._consolidate(body, [head_row])),
+        ('_consolidate (merge)',      lambda: utils._consolidate(body, [old_row])),
+    ]
+
+
+def search_cases(n):
+    catalogue = synthetic_catalogue(n)
+    index = SearchIndex()
+    index.sync(catalogue)
+    title_word = catalogue[0].title.split()[0]
+    typo = title_word[:-1] + ('x' if title_word[-1] != 'x' else 'y')
+    changed = list(catalogue)
+
+    def resync():
+        # one entry modified since the last listing
+        changed[0] = changed[0]._replace(modified_at=f'{time.time()}')
+        index.sync(list(changed))
+
+    return [
+        ('SearchIndex.sync (build)',       lambda: SearchIndex().sync(catalogue)),
+        ('SearchIndex.search (prefix)',    lambda: index.search(f'{title_word[:3]} {catalogue[0].category[:4]}')),
+        ('SearchIndex.search (fuzzy)',     lambda: index.search(typo)),
+        ('SearchIndex.sync (1 changed)',   resync),
+    ]
+
+
+def api_cases(server, client, n):
+    body = synthetic_body(n)
+    transcript = synthetic_rows(BULK_ROWS)
+    counter = iter(range(10**9))
+
+    def reset():
+        # fresh body every run, so the entry does not grow across repeats
+        with server.store.lock:
+            server.store.entries['experiments'][1]['body'] = body
+        st.session_state.pop('_catalogue_cache', None)
+        _clear_log_cache()
+
+    def append():
+        utils.append_to_experiment(client, 1, f'benchmark line {next(counter)}', initials='bench')
+
+    def bulk():
+        utils.bulk_append_to_experiment(client, 1, transcript)
+
+    def open_entry():
+        entry = utils.get_entry(client, 1)
+        utils.check_log_compatibility(entry.body, entry_id=1)
+
+    return reset, [
+        ('append_to_experiment',                append),
+        (f'bulk_append ({BULK_ROWS} rows)',     bulk),
+        ('open entry + compatibility check',    open_entry),
+        ('get_catalogue (cold)',                lambda: utils.get_catalogue(client, 'experiments')),
+        ('create_experiment',                   lambda: utils.create_experiment(client, 'bench', 'first line')),
+    ]
+
+
+# ── Runner ────────────────────────────────────────────────────────────────────
+
+def _git_rev():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=_HERE,
+                              capture_output=True, text=True, timeout=10).stdout.strip()
+    except Exception:
+        return ''
+
+
+def _print_row(result):
+    trips = '' if result['round_trips'] is None else f"{result['round_trips']:>6.1f}"
+    print(f"{result['group']:>6}  {result['name']:<34} {result['rows']:>7}  "
+          f"{result['median_s'] * 1000:>10.3f}  {result['peak_bytes'] / 1024:>10.1f}  {trips:>6}")
+
+
+def run(row_counts, latency, groups, catalogue_entries):
+    results = []
+    print(f"{'group':>6}  {'case':<34} {'rows':>7}  {'ms/op':>10}  {'peak KiB':>10}  {'trips':>6}")
+
+    if 'engine' in groups:
+        failures = check_splice(row_counts)
+        if failures:
+            sys.exit('splice differs from full merge: ' + ', '.join(failures))
+        for n in row_counts:
+            for name, op in engine_cases(n) + search_cases(n):
+                median, peak, runs = _measure(op, setup=_clear_log_cache)
+                results.append({'group': 'engine', 'name': name, 'rows': n, 'median_s': median,
+                                'peak_bytes': peak, 'runs': runs, 'round_trips': None})
+                _print_row(results[-1])
+
+    if 'api' in groups:
+        with FakeElab(n_entries=catalogue_entries, latency=latency) as server:
+            client = server.api_client()
+            for n in row_counts:
+                reset, cases = api_cases(server, client, n)
+                for name, op in cases:
+                    before = sum(server.calls.values())
+                    median, peak, runs = _measure(op, setup=reset, repeats=API_REPEATS)
+                    trips = (sum(server.calls.values()) - before) / (runs + 1)
+                    results.append({'group': 'api', 'name': name, 'rows': n, 'median_s': median,
+                                    'peak_bytes': peak, 'runs': runs, 'round_trips': trips})
+                    _print_row(results[-1])
+    return results
+
+
+def compare(results, old_path):
+    old = {(r['group'], r['name'], r['rows']): r for r in json.loads(Path(old_path).read_text())['results']}
+    print(f"\nCompared with {old_path}  (ratio new / old; ! marks > {REGRESSION_RATIO}x)")
+    print(f"{'case':<42} {'rows':>7}  {'time':>7}  {'alloc':>7}  {'trips':>7}")
+    n_regressions = 0
+    for r in results:
+        o = old.get((r['group'], r['name'], r['rows']))
+        if o is None:
+            continue
+        cells = []
+        for key in ('median_s', 'peak_bytes', 'round_trips'):
+            if r[key] is None or not o.get(key):
+                cells.append(f"{'':>7}")
+                continue
+            ratio = r[key] / o[key]
+            flag = '!' if ratio > REGRESSION_RATIO else ' '
+            n_regressions += flag == '!'
+            cells.append(f'{ratio:>6.2f}{flag}')
+        print(f"{r['group'] + ' ' + r['name']:<42} {r['rows']:>7}  " + '  '.join(cells))
+    print(f'{n_regressions} regression(s)')
+    return n_regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the log-table engine and API call paths.')
+    parser.add_argument('--max-rows', type=int, default=ROW_COUNTS[-1])
+    parser.add_argument('--latency', type=float, default=0.005, help='fake API latency per request (s)')
+    parser.add_argument('--entries', type=int, default=500, help='entries in the fake catalogue')
+    parser.add_argument('--only', choices=['engine', 'api'], help='run one group only')
+    parser.add_argument('--quick', action='store_true', help='shorter timing budget per case')
+    parser.add_argument('--save', help='result file (default: benchmarks/results/<version>.json)')
+    parser.add_argument('--compare', help='earlier result file to compare with')
+    args = parser.parse_args()
+
+    global MIN_TIME, API_REPEATS
+    if args.quick:
+        MIN_TIME, API_REPEATS = 0.05, 2
+
+    groups = [args.only] if args.only else ['engine', 'api']
+    row_counts = [n for n in ROW_COUNTS if n <= args.max_rows]
+    results = run(row_counts, args.latency, groups, args.entries)
+
+    save_path = Path(args.save) if args.save else RESULTS_DIR / f'{LOG_SCHEMA_VERSION}.json'
+    save_path.parent.mkdir(parents=True, exist_ok=True)
+    save_path.write_text(json.dumps({
+        'app_version': LOG_SCHEMA_VERSION,
+        'git_rev':     _git_rev(),
+        'python':      platform.python_version(),
+        'machine':     platform.machine(),
+        'date':        datetime.datetime.now().isoformat(timespec='seconds'),
+        'latency_s':   args.latency,
+        'results':     results,
+    }, indent=2))
+    print(f'\nSaved {len(results)} results to {save_path}')
+
+    if args.compare:
+        sys.exit(1 if compare(results, args.compare) else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""stress_concurrent_appends.py — Concurrent log appends to one entry.
+
+Run from the repository root:
+
+    python benchmarks/stress_concurrent_appends.py [writers] [rows_per_writer] [latency_s]
+
+Starts a local fake elabFTW (fake_elab.py) and lets several writers append
+rows to the same experiment at the same time in three modes:
+
+  naive     -- plain read-modify-write (GET, merge, PATCH — what the app did
+               before conflict detection)
+  checked   -- ``utils._merge_into_entry`` with the writers sharing the
+               per-entry locks, like the sessions of one app server
+  instances -- ``utils._merge_into_entry`` with every writer on its own locks,
+               like separate app instances: the PATCHes really interleave and
+               only the read-back check stands between them
+
+Reports how many rows survived, how many were lost, how many merges were
+retried and how many requests were made.  Rows whose append raised
+(WriteConflictError) go to the offline outbox in the app; "silent" counts rows
+lost without an error.  Exits with status 1 if the checked mode loses any row
+silently, or if the instances mode never hit the conflict path (no retry and
+no WriteConflictError) or lost as many rows silently as the naive mode.
+elabFTW has no conditional PATCH, so the instances mode can still lose a few
+rows silently; that window is what it measures.
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src" / "elab_app"))
+
+import utils  # noqa: E402
+from fake_elab import FakeElab  # noqa: E402
+
+EXP_ID = 1
+
+
+def _naive_append(api_client, row):
+    entry = utils.get_entry(api_client, EXP_ID)
+    new_content, *_ = utils._consolidate(entry.body or '', [row], entry_id=EXP_ID)
+    utils._patch_fields(api_client, EXP_ID, {'body': new_content}, 'experiments')
+
+
+def _checked_append(api_client, row):
+    utils._merge_into_entry(api_client, EXP_ID, [row])
+
+
+def run(append, writers, rows_per_writer, latency, shared_locks=True):
+    entry_lock, consolidate = utils._entry_lock, utils._consolidate
+    merges = []
+
+    def counting_consolidate(*args, **kwargs):
+        merges.append(1)
+        return consolidate(*args, **kwargs)
+
+    utils._consolidate = counting_consolidate
+    if not shared_locks:
+        # a fresh lock per call is never contended: nothing serialises the writers
+        utils._entry_lock = lambda *_: threading.Lock()
+    try:
+        saved, errors, requests, elapsed = _run(append, writers, rows_per_writer, latency)
+    finally:
+        utils._entry_lock, utils._consolidate = entry_lock, consolidate
+    retries = len(merges) - writers * rows_per_writer if append is _checked_append else 0
+    return saved, errors, retries, requests, elapsed
+
+
+def _run(append, writers, rows_per_writer, latency):
+    with FakeElab(n_entries=1, latency=latency) as server:
+        errors = []
+
+        def writer(w):
+            api_client = server.api_client()
+            for i in range(rows_per_writer):
+                ts = f'2026-01-01T{w:02d}:{i // 60:02d}:{i % 60:02d}'
+                try:
+                    append(api_client, (ts, f'<p>writer {w} row {i}</p>', f'w{w}', 'stress'))
+                except Exception as exc:
+                    errors.append(exc)
+
+        threads = [threading.Thread(target=writer, args=(w,)) for w in range(writers)]
+        t0 = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - t0
+
+        body = server.store.entries['experiments'][EXP_ID]['body']
+        saved = len(utils.get_log_table(body).rows)
+        requests = sum(server.calls.values())
+    return saved, errors, requests, elapsed
+
+
+def main():
+    writers = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    rows_per_writer = int(sys.argv[2]) if len(sys.argv) > 2 else 25
+    latency = float(sys.argv[3]) if len(sys.argv) > 3 else 0.01
+    expected = writers * rows_per_writer
+    print(f'{writers} writers × {rows_per_writer} rows, {latency * 1000:.0f} ms latency per request')
+    print(f"{'mode':>10}  {'saved':>6}  {'lost':>5}  {'errors':>6}  {'silent':>6}  {'retries':>7}"
+          f"  {'requests':>8}  {'seconds':>7}")
+    silent, conflicts = {}, {}
+    for name, append, shared_locks in (('naive', _naive_append, True),
+                                       ('checked', _checked_append, True),
+                                       ('instances', _checked_append, False)):
+        saved, errors, retries, requests, elapsed = run(append, writers, rows_per_writer, latency,
+                                                        shared_locks=shared_locks)
+        lost = expected - saved
+        silent[name] = lost - len(errors)
+        conflicts[name] = retries + len(errors)
+        print(f'{name:>10}  {saved:>6}  {lost:>5}  {len(errors):>6}  {silent[name]:>6}  {retries:>7}'
+              f'  {requests:>8}  {elapsed:>7.2f}')
+    if silent['checked']:
+        sys.exit(f"checked appends lost {silent['checked']} row(s) without an error")
+    if writers > 1 and not conflicts['instances']:
+        sys.exit('instances mode never retried a merge: the conflict path was not exercised')
+    if silent['naive'] and silent['instances'] >= silent['naive']:
+        sys.exit(f"instances mode lost {silent['instances']} row(s) silently, "
+                 f"no fewer than the naive mode ({silent['naive']})")
+
+
+if __name__ == '__main__':
+    main()
@@ -2,27 +2,53 @@
 
 Each user has one encrypted file:  keys/<short_name>.enc
 File format (binary, concatenated):
-    16 bytes  — random salt (for PBKDF2)
-    N bytes   — Fernet-encrypted API key
-
-The Fernet symmetric key is derived from the user's PIN via PBKDF2-HMAC-SHA256,
-so the raw API key is never stored on disk in plaintext.
+    legacy — PBKDF2-HMAC-SHA256 with PBKDF2_ITERATIONS:
+        16 bytes  — random salt
+        N bytes   — Fernet-encrypted API key
+    versioned — any other KDF settings:
+         3 bytes  — b"EKF"
+         1 byte   — format version (2)
+         1 byte   — KDF id (1 = PBKDF2, 2 = scrypt)
+        KDF parameters — PBKDF2: iterations (uint32, big-endian);
+                         scrypt: log2(n), r, p (1 byte each)
+        16 bytes  — random salt
+        N bytes   — Fernet-encrypted API key
+
+The Fernet symmetric key is derived from the user's PIN (PBKDF2 or the
+memory-hard scrypt, see the ``kdf`` setting), so the raw API key is never
+stored on disk in plaintext.  A key file written with other KDF settings than
+the configured ones is re-encrypted on the next successful login.
+
+With ``unlock_ttl`` set, a successful login keeps the derived key in the
+in-process key agent for that many seconds, so further logins (new browser
+tabs, re-opening the app) with the same PIN skip the key derivation.
 """
 
+import hashlib
+import hmac
 import os
 import re
+import socket
+import struct
+import threading
+import time
 import tomllib
+from collections import OrderedDict
 from pathlib import Path
 
 from cryptography.fernet import Fernet, InvalidToken
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from cryptography.hazmat.primitives.kdf.scrypt import Scrypt
 from cryptography.hazmat.primitives import hashes
 import base64
 
 import elabapi_python
+import urllib3
 from platformdirs import user_config_dir
 from warnings import filterwarnings
 
+from metrics import instrument
+
 filterwarnings("ignore")
 
 # ── Constants ────────────────────────────────────────────────────────────────
@@ -34,21 +60,138 @@ KEYS_DIR.mkdir(parents=True, exist_ok=True)
 _DEFAULT_HOST = "https://eln.ub.tum.de/api/v2"
 
 
-def _get_elab_host() -> str:
+def _load_config() -> dict:
     cfg_file = _CONFIG_DIR / "config.toml"
     if cfg_file.exists():
         with open(cfg_file, "rb") as f:
-            return tomllib.load(f).get("elab_host", _DEFAULT_HOST)
-    return _DEFAULT_HOST
+            return tomllib.load(f)
+    return {}
+
+
+def _config_flag(key: str) -> bool:
+    # `elab-app config set` writes every value as a string
+    return str(_load_config().get(key, "")).strip().lower() in ("1", "true", "yes", "on")
+
+
+def _get_elab_host() -> str:
+    return _load_config().get("elab_host", _DEFAULT_HOST)
+
+
+def parse_setting(key: str, value) -> int | float | bool | str:
+    """Parse one connection or key-store setting from its config.toml string.
+
+    Raises
+    ------
+    KeyError
+        If *key* is not one of SETTING_DEFAULTS.
+    ValueError
+        If *value* does not parse or is out of range.
+    """
+    default = SETTING_DEFAULTS[key]
+    text = str(value).strip().lower()
+    if isinstance(default, bool):
+        if text in ("1", "true", "yes", "on"):
+            return True
+        if text in ("0", "false", "no", "off"):
+            return False
+        raise ValueError(f"{key} must be true or false, not {value!r}")
+    if isinstance(default, str):
+        if text in _SETTING_CHOICES[key]:
+            return text
+        raise ValueError(f"{key} must be one of {', '.join(_SETTING_CHOICES[key])}, not {value!r}")
+    kind = type(default)
+    low, high = _SETTING_LIMITS.get(key, (0, None))
+    try:
+        parsed = kind(text)
+    except ValueError:
+        parsed = None
+    if parsed is None or parsed < low or (high is not None and parsed > high):
+        bounds = f">= {low}" if high is None else f"between {low} and {high}"
+        raise ValueError(f"{key} must be {'an integer' if kind is int else 'a number'} "
+                         f"{bounds}, not {value!r}")
+    return parsed
+
+
+def _settings(defaults: dict, cfg: dict | None) -> dict:
+    # config.toml over *defaults*; values that do not parse fall back to the default
+    cfg = _load_config() if cfg is None else cfg
+    settings = dict(defaults)
+    for key in defaults:
+        if key in cfg:
+            try:
+                settings[key] = parse_setting(key, cfg[key])
+            except ValueError:
+                pass
+    return settings
+
+
+def connection_settings(cfg: dict | None = None) -> dict:
+    """Return the effective connection settings (config.toml over CONNECTION_DEFAULTS)."""
+    return _settings(CONNECTION_DEFAULTS, cfg)
+
+
+def key_store_settings(cfg: dict | None = None) -> dict:
+    """Return the effective key-store settings (config.toml over KEY_STORE_DEFAULTS)."""
+    return _settings(KEY_STORE_DEFAULTS, cfg)
 
 
 ELAB_HOST = _get_elab_host()
 
+# Show the API metrics panel in the sidebar (`elab-app config set debug_panel true`)
+DEBUG_PANEL = _config_flag("debug_panel")
+
 # Short name must be lowercase letters, digits, or underscores, starting with a letter
 _SHORT_NAME_RE = re.compile(r"^[a-z][a-z0-9_]*$")
 
 PBKDF2_ITERATIONS = 480_000  # OWASP 2023 recommendation for PBKDF2-HMAC-SHA256
 
+# Key-store settings (`elab-app config set <key> <value>`).  With the defaults
+# key files keep the legacy layout, readable by older versions of the app.
+KEY_STORE_DEFAULTS = {
+    "kdf":               "pbkdf2",           # pbkdf2 | scrypt (memory-hard)
+    "pbkdf2_iterations": PBKDF2_ITERATIONS,
+    "scrypt_cost":       15,                 # log2(n); 15 = 32 MiB and ~0.1 s per login
+    "unlock_ttl":        0,                  # seconds a login stays unlocked; 0 = off
+}
+SCRYPT_R = 8
+SCRYPT_P = 1
+
+# HTTP connection settings (`elab-app config set <key> <value>`).  The pool
+# must hold at least as many connections as there are concurrent workers
+# (export: 8, login warm-up: 6, bulk create: 4 unless --workers says otherwise,
+# link posts: up to 8 per entry, write-behind: 1), otherwise
+# urllib3 opens — and discards — extra connections, each with a fresh TLS
+# handshake.
+CONNECTION_DEFAULTS = {
+    "pool_maxsize":    16,     # connections kept open to the elabFTW host
+    "keep_alive":      True,   # reuse connections, send TCP keep-alive probes
+    "connect_timeout": 10.0,   # seconds
+    "read_timeout":    60.0,   # seconds
+    "retries":         3,      # connection errors, and 429/502/503/504 on idempotent requests
+    "retry_backoff":   0.5,    # seconds, doubled per retry
+}
+_RETRY_STATUSES = (429, 502, 503, 504)
+_KEEPALIVE_IDLE = 60           # seconds idle before the first TCP keep-alive probe
+
+MAX_CACHED_CLIENTS = 32        # pooled clients kept per process (one per API key)
+
+SETTING_DEFAULTS = {**CONNECTION_DEFAULTS, **KEY_STORE_DEFAULTS}
+_SETTING_CHOICES = {"kdf": ("pbkdf2", "scrypt")}
+_SETTING_LIMITS = {                  # (min, max); others must be >= 0
+    "pool_maxsize":      (1, None),
+    "pbkdf2_iterations": (100_000, None),
+    "scrypt_cost":       (14, 20),   # 16 MiB … 1 GiB of memory per derivation
+}
+
+CONNECTION = connection_settings()
+KEY_STORE = key_store_settings()
+
+_HEADER_MAGIC = b"EKF"
+_FORMAT_VERSION = 2
+_KDF_IDS = {"pbkdf2": 1, "scrypt": 2}
+_KDF_PARAMS_FORMAT = {"pbkdf2": ">I", "scrypt": ">BBB"}
+_SALT_BYTES = 16
+
 
 # ── Validation ───────────────────────────────────────────────────────────────
 
@@ -78,18 +221,118 @@ def user_exists(short_name: str) -> bool:
     return _key_path(short_name).exists()
 
 
-def _derive_fernet_key(pin: str, salt: bytes) -> bytes:
-    """Derive a 32-byte Fernet-compatible key from *pin* and *salt*."""
-    kdf = PBKDF2HMAC(
-        algorithm=hashes.SHA256(),
-        length=32,
-        salt=salt,
-        iterations=PBKDF2_ITERATIONS,
-    )
-    raw = kdf.derive(pin.encode())
+def _derive_fernet_key(pin: str, salt: bytes, kdf: str = "pbkdf2",
+                       params: tuple = (PBKDF2_ITERATIONS,)) -> bytes:
+    """Derive a 32-byte Fernet-compatible key from *pin* and *salt*.
+
+    *params* are (iterations,) for PBKDF2 and (log2 n, r, p) for scrypt.
+    """
+    if kdf == "scrypt":
+        log_n, r, p = params
+        derivation = Scrypt(salt=salt, length=32, n=2 ** log_n, r=r, p=p)
+    else:
+        derivation = PBKDF2HMAC(
+            algorithm=hashes.SHA256(),
+            length=32,
+            salt=salt,
+            iterations=params[0],
+        )
+    raw = derivation.derive(pin.encode())
     return base64.urlsafe_b64encode(raw)
 
 
+def _configured_kdf() -> tuple[str, tuple]:
+    """(kdf, params) new key files are written with."""
+    if KEY_STORE["kdf"] == "scrypt":
+        return "scrypt", (KEY_STORE["scrypt_cost"], SCRYPT_R, SCRYPT_P)
+    return "pbkdf2", (KEY_STORE["pbkdf2_iterations"],)
+
+
+def _pack_key_file(kdf: str, params: tuple, salt: bytes, token: bytes) -> bytes:
+    if (kdf, params) == ("pbkdf2", (PBKDF2_ITERATIONS,)):
+        return salt + token
+    return (_HEADER_MAGIC + bytes([_FORMAT_VERSION, _KDF_IDS[kdf]])
+            + struct.pack(_KDF_PARAMS_FORMAT[kdf], *params) + salt + token)
+
+
+def _unpack_key_file(data: bytes) -> tuple[str, tuple, bytes, bytes]:
+    """Split a key file into (kdf, params, salt, Fernet token)."""
+    if data[:3] == _HEADER_MAGIC and data[3:4] == bytes([_FORMAT_VERSION]):
+        kdf = next((name for name, i in _KDF_IDS.items() if data[4:5] == bytes([i])), None)
+        if kdf is not None:
+            fmt = _KDF_PARAMS_FORMAT[kdf]
+            end = 5 + struct.calcsize(fmt)
+            params = struct.unpack(fmt, data[5:end])
+            return kdf, params, data[end:end + _SALT_BYTES], data[end + _SALT_BYTES:]
+    return "pbkdf2", (PBKDF2_ITERATIONS,), data[:_SALT_BYTES], data[_SALT_BYTES:]
+
+
+def _write_key_file(short_name: str, pin: str, api_key: str) -> tuple[bytes, bytes]:
+    """Encrypt *api_key* with the configured KDF and replace the key file atomically.
+
+    Returns (digest of the file, derived Fernet key).
+    """
+    kdf, params = _configured_kdf()
+    salt = os.urandom(_SALT_BYTES)
+    fernet_key = _derive_fernet_key(pin, salt, kdf, params)
+    data = _pack_key_file(kdf, params, salt, Fernet(fernet_key).encrypt(api_key.strip().encode()))
+    path = _key_path(short_name)
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "wb") as fh:
+        fh.write(data)
+    os.replace(tmp, path)
+    return hashlib.sha256(data).digest(), fernet_key
+
+
+# ── Key agent ────────────────────────────────────────────────────────────────
+# short_name -> (key-file digest, nonce, PIN check, Fernet key, expiry).  The
+# PIN is still checked on every login; only the slow derivation is skipped.
+# A wrong PIN or logging out drops the held key.
+
+_AGENT: dict[str, tuple] = {}
+_agent_lock = threading.Lock()
+
+
+def _pin_check(pin: str, nonce: bytes) -> bytes:
+    return hashlib.sha256(nonce + pin.encode()).digest()
+
+
+def _agent_unlock(short_name: str, file_digest: bytes, pin: str, fernet_key: bytes) -> None:
+    ttl = KEY_STORE["unlock_ttl"]
+    if ttl <= 0:
+        return
+    nonce = os.urandom(16)
+    with _agent_lock:
+        _AGENT[short_name] = (file_digest, nonce, _pin_check(pin, nonce), fernet_key,
+                              time.monotonic() + ttl)
+
+
+def _agent_key(short_name: str, file_digest: bytes, pin: str) -> bytes | None:
+    """Return the held Fernet key if *short_name* is unlocked for this file and PIN."""
+    with _agent_lock:
+        held = _AGENT.get(short_name)
+        if held is None:
+            return None
+        digest, nonce, check, fernet_key, expires = held
+        if time.monotonic() >= expires or digest != file_digest:
+            del _AGENT[short_name]
+            return None
+    if not hmac.compare_digest(_pin_check(pin, nonce), check):
+        # a wrong PIN locks the key, so every further guess pays the full derivation
+        lock_key(short_name)
+        return None
+    return fernet_key
+
+
+def lock_key(short_name: str | None = None) -> None:
+    """Forget the unlocked key of *short_name* (of every user if None)."""
+    with _agent_lock:
+        if short_name is None:
+            _AGENT.clear()
+        else:
+            _AGENT.pop(short_name, None)
+
+
 # ── Public API ───────────────────────────────────────────────────────────────
 
 def save_key(short_name: str, pin: str, api_key: str) -> None:
@@ -103,17 +346,16 @@ def save_key(short_name: str, pin: str, api_key: str) -> None:
     if not is_valid_short_name(short_name):
         raise ValueError(f"Invalid short name: {short_name!r}")
     KEYS_DIR.mkdir(parents=True, exist_ok=True)
-    salt = os.urandom(16)
-    fernet_key = _derive_fernet_key(pin, salt)
-    f = Fernet(fernet_key)
-    encrypted = f.encrypt(api_key.strip().encode())
-    with open(_key_path(short_name), "wb") as fh:
-        fh.write(salt + encrypted)
+    lock_key(short_name)
+    _write_key_file(short_name, pin, api_key)
 
 
 def load_key(short_name: str, pin: str) -> str:
     """Decrypt and return the API key for *short_name* using *pin*.
 
+    Skips the key derivation while the user is unlocked in the key agent, and
+    re-encrypts a key file written with other than the configured KDF settings.
+
     Raises
     ------
     FileNotFoundError
@@ -126,28 +368,116 @@ def load_key(short_name: str, pin: str) -> str:
         raise FileNotFoundError(f"No key file found for user '{short_name}'.")
     with open(path, "rb") as fh:
         data = fh.read()
-    salt, encrypted = data[:16], data[16:]
-    fernet_key = _derive_fernet_key(pin, salt)
+    kdf, params, salt, encrypted = _unpack_key_file(data)
+    file_digest = hashlib.sha256(data).digest()
+    fernet_key = _agent_key(short_name, file_digest, pin)
+    unlocked = fernet_key is not None
+    if not unlocked:
+        fernet_key = _derive_fernet_key(pin, salt, kdf, params)
     try:
         api_key = Fernet(fernet_key).decrypt(encrypted).decode()
     except InvalidToken:
         raise ValueError("Incorrect PIN or corrupted key file.")
+
+    if (kdf, params) != _configured_kdf():
+        try:
+            file_digest, fernet_key = _write_key_file(short_name, pin, api_key)
+            unlocked = False
+        except OSError:
+            pass    # keep using the old file; migration is retried next login
+    if not unlocked:
+        # the unlock window starts at a derivation; agent hits do not extend it
+        _agent_unlock(short_name, file_digest, pin, fernet_key)
     return api_key
 
 
 # ── elabFTW helpers ──────────────────────────────────────────────────────────
 
-def _make_api_client(api_key: str) -> elabapi_python.ApiClient:
+def _keepalive_socket_options() -> list:
+    options = urllib3.connection.HTTPConnection.default_socket_options + [
+        (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+    if hasattr(socket, "TCP_KEEPIDLE"):       # Linux
+        options += [(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, _KEEPALIVE_IDLE),
+                    (socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, _KEEPALIVE_IDLE // 4)]
+    elif hasattr(socket, "TCP_KEEPALIVE"):    # macOS
+        options += [(socket.IPPROTO_TCP, socket.TCP_KEEPALIVE, _KEEPALIVE_IDLE)]
+    return options
+
+
+def _tune_connections(client: elabapi_python.ApiClient, settings: dict) -> None:
+    """Apply retry, keep-alive and default-timeout *settings* to *client*'s pool."""
+    rest = client.rest_client
+    # read by every connection pool the manager creates from here on
+    pool_kw = rest.pool_manager.connection_pool_kw
+    pool_kw["retries"] = urllib3.Retry(
+        total=settings["retries"],
+        backoff_factor=settings["retry_backoff"],
+        status_forcelist=_RETRY_STATUSES,
+        raise_on_status=False,    # the last error response still becomes an ApiException
+    )
+    if settings["keep_alive"]:
+        pool_kw["socket_options"] = _keepalive_socket_options()
+    else:
+        client.set_default_header(header_name="Connection", header_value="close")
+
+    # the REST layer hands urllib3 timeout=None ("wait forever") unless a call
+    # passes _request_timeout, so fill in the configured default here
+    timeout = (settings["connect_timeout"], settings["read_timeout"])
+    request = rest.request
+
+    def _request(method, url, query_params=None, headers=None, body=None,
+                 post_params=None, _preload_content=True, _request_timeout=None):
+        return request(method, url, query_params=query_params, headers=headers, body=body,
+                       post_params=post_params, _preload_content=_preload_content,
+                       _request_timeout=_request_timeout or timeout)
+
+    rest.request = _request
+
+
+def _make_api_client(api_key: str, settings: dict | None = None) -> elabapi_python.ApiClient:
     """Build an elabapi_python ApiClient from a raw API key."""
+    settings = CONNECTION if settings is None else settings
     cfg = elabapi_python.Configuration()
     cfg.api_key["api_key"] = api_key
     cfg.api_key_prefix["api_key"] = "Authorization"
     cfg.host = ELAB_HOST
     cfg.debug = False
     cfg.verify_ssl = False
+    cfg.connection_pool_maxsize = settings["pool_maxsize"]
     client = elabapi_python.ApiClient(cfg)
     client.set_default_header(header_name="Authorization", header_value=api_key)
-    return client
+    _tune_connections(client, settings)
+    return instrument(client)   # per-endpoint call counts and latencies (metrics.py)
+
+
+# One pooled client per API key, shared by every rerun, browser tab and worker
+# thread of that user, so open (TLS) connections are reused instead of each
+# login or export paying for new handshakes.
+_CLIENTS: "OrderedDict[str, elabapi_python.ApiClient]" = OrderedDict()
+_clients_lock = threading.Lock()
+
+
+def _client_cache_key(api_key: str) -> str:
+    return hashlib.sha256(f"{ELAB_HOST}\0{api_key}".encode()).hexdigest()
+
+
+def get_api_client(api_key: str) -> elabapi_python.ApiClient:
+    """Return the shared, pooled ApiClient for *api_key*, building it on first use."""
+    cache_key = _client_cache_key(api_key)
+    with _clients_lock:
+        client = _CLIENTS.get(cache_key)
+        if client is None:
+            client = _CLIENTS[cache_key] = _make_api_client(api_key)
+            while len(_CLIENTS) > MAX_CACHED_CLIENTS:
+                _CLIENTS.popitem(last=False)    # sessions holding it keep working
+        _CLIENTS.move_to_end(cache_key)
+        return client
+
+
+def forget_api_client(api_key: str) -> None:
+    """Drop the shared client for *api_key* (e.g. after the key was rejected)."""
+    with _clients_lock:
+        _CLIENTS.pop(_client_cache_key(api_key), None)
 
 
 def fetch_user_info(api_key: str) -> dict:
@@ -168,13 +498,18 @@ def fetch_user_info(api_key: str) -> dict:
         On authentication failure or network error.
     """
     import json as _json
-    client = _make_api_client(api_key)
-    uapi = elabapi_python.UsersApi(client)
+    # the login check opens the connections the session will go on to use
+    uapi = elabapi_python.UsersApi(get_api_client(api_key))
 
     # Fetch the raw JSON response so we always get the 'teams' field regardless
     # of which elabapi_python version is installed (5.5+ dropped it from the
     # model, but the API still returns it for the user's own teams).
-    raw_response = uapi.read_user("me", _preload_content=False)
+    try:
+        raw_response = uapi.read_user("me", _preload_content=False)
+    except elabapi_python.rest.ApiException as exc:
+        if exc.status in (401, 403):
+            forget_api_client(api_key)
+        raise
     me = _json.loads(raw_response.data)
 
     teams = [{"id": t["id"], "name": t["name"]} for t in (me.get("teams") or [])]
@@ -189,4 +524,4 @@ def fetch_user_info(api_key: str) -> dict:
 
 def build_api_client_from_session(api_key: str) -> elabapi_python.ApiClient:
     """Convenience wrapper used by main.py after a successful login."""
-    return _make_api_client(api_key)
+    return get_api_client(api_key)
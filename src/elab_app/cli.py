@@ -4,9 +4,11 @@ Commands:
     elab-app start              Launch the Streamlit interface
     elab-app config show        Print current configuration
     elab-app config set KEY VAL Write a key=value to the config file
+    elab-app create --from-csv  Create many experiments/resources from a CSV file
 """
 from __future__ import annotations
 
+import csv
 import shutil
 import subprocess
 import sys
@@ -31,6 +33,12 @@ def _load_config() -> dict:
     return {"elab_host": _DEFAULT_HOST}
 
 
+def _app_imports() -> None:
+    # auth/utils use the app's flat imports (as under `streamlit run`)
+    if str(Path(__file__).parent) not in sys.path:
+        sys.path.insert(0, str(Path(__file__).parent))
+
+
 def _save_config(config: dict) -> None:
     _CONFIG_DIR.mkdir(parents=True, exist_ok=True)
     with open(_CONFIG_FILE, "w", encoding="utf-8") as f:
@@ -67,6 +75,16 @@ def _show_config() -> None:
     for k, v in cfg.items():
         typer.echo(f"  {k} = {v}")
 
+    _app_imports()
+    from auth import connection_settings, key_store_settings
+
+    for title, settings in (("Connection", connection_settings(cfg)),
+                            ("Key store", key_store_settings(cfg))):
+        typer.echo(f"\n=== {title} (effective) ===")
+        for k, v in settings.items():
+            note = "" if k in cfg else "   (default)"
+            typer.echo(f"  {k} = {str(v).lower() if isinstance(v, bool) else v}{note}")
+
     typer.echo("\n=== Users (encrypted key files) ===")
     keys_dir = _CONFIG_DIR / "keys"
     typer.echo(f"  Directory   : {keys_dir}")
@@ -115,6 +133,14 @@ def config(
         if not key or value is None:
             typer.echo("Usage: elab-app config set <key> <value>", err=True)
             raise typer.Exit(1)
+        _app_imports()
+        from auth import SETTING_DEFAULTS, parse_setting
+        if key in SETTING_DEFAULTS:
+            try:
+                parse_setting(key, value)
+            except ValueError as exc:
+                typer.echo(str(exc), err=True)
+                raise typer.Exit(1)
         cfg = _load_config()
         cfg[key] = value
         _save_config(cfg)
@@ -128,3 +154,75 @@ def config(
     else:
         typer.echo(f"Unknown action '{action}'. Use 'show' or 'set'.", err=True)
         raise typer.Exit(1)
+
+
+@app.command()
+def create(
+    from_csv: Path = typer.Option(..., "--from-csv", exists=True, dir_okay=False,
+                                  help="CSV with a header row: name[,comment][,category]"),
+    user: str = typer.Option(..., "--user", prompt="Initials", help="Initials of your key file"),
+    entity_type: str = typer.Option("experiments", "--type", help="experiments | items"),
+    workers: int = typer.Option(4, "--workers", min=1, help="Entries created in parallel"),
+):
+    """Create many experiments (or resources) at once from a CSV file.
+
+    The CSV needs a header row with a 'name' column; 'comment' (initial body)
+    and 'category' (category / items type id) are optional.
+
+    Example:\n
+        elab-app create --from-csv beamtime.csv --user ljf
+    """
+    if entity_type not in ("experiments", "items"):
+        typer.echo(f"Unknown type '{entity_type}'. Use 'experiments' or 'items'.", err=True)
+        raise typer.Exit(1)
+
+    with open(from_csv, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    if not rows or "name" not in rows[0]:
+        typer.echo("CSV must have a header row with at least a 'name' column.", err=True)
+        raise typer.Exit(1)
+
+    specs = []
+    for row_num, row in enumerate(rows, start=2):
+        name = (row.get("name") or "").strip()
+        category = (row.get("category") or "").strip()
+        if not name:
+            typer.echo(f"Row {row_num}: empty name — skipped", err=True)
+            continue
+        if category and not category.isdigit():
+            typer.echo(f"Row {row_num}: category '{category}' is not an id — skipped", err=True)
+            continue
+        specs.append({
+            "row": row_num,
+            "name": name,
+            "comment": (row.get("comment") or "").strip(),
+            "catid": int(category) if category else 0,
+            "entity_type": entity_type,
+        })
+    if not specs:
+        typer.echo("Nothing to create.", err=True)
+        raise typer.Exit(1)
+
+    _app_imports()
+    from auth import load_key, build_api_client_from_session
+    from utils import create_experiments_bulk
+
+    pin = typer.prompt("PIN", hide_input=True)
+    try:
+        api_key = load_key(user, pin)
+    except (FileNotFoundError, ValueError) as exc:
+        typer.echo(str(exc), err=True)
+        raise typer.Exit(1)
+    api_client = build_api_client_from_session(api_key)
+
+    results = create_experiments_bulk(api_client, specs, workers=workers)
+    n_failed = 0
+    for spec, new_id, error in results:
+        if error is None:
+            typer.echo(f"Row {spec['row']}: created {spec['name']!r} (id {new_id})")
+        else:
+            n_failed += 1
+            typer.echo(f"Row {spec['row']}: FAILED {spec['name']!r}: {error}", err=True)
+    typer.echo(f"{len(results) - n_failed} created, {n_failed} failed")
+    if n_failed:
+        raise typer.Exit(1)
@@ -1,4 +1,5 @@
 from pathlib import Path
+import streamlit as st
 import streamlit.components.v1 as components
 
 _COMPONENT_DIR = Path(__file__).parent / "hashtag_textarea"
@@ -8,35 +9,64 @@ _hashtag_textarea_func = components.declare_component(
     path=str(_COMPONENT_DIR),
 )
 
+QUERY_LIMIT = 10         # matches sent to the browser per query
+QUERY_DEBOUNCE_MS = 150  # typing pause before the browser asks for matches
+
 
 def hashtag_textarea(
-    items: list,
-    base_url: str,
+    items: list | None = None,
+    base_url: str = "",
     value: str = "",
     placeholder: str = "",
     reset_key: int = 0,
     key: str | None = None,
+    search=None,
+    item_count: int | None = None,
 ) -> dict | None:
     """Textarea with hashtag-triggered resource autocomplete.
 
+    By default the whole ``items`` list is sent to the browser, which filters
+    it as the user types.  With ``search`` the component runs in query mode:
+    no list is sent; after a short typing pause the browser returns the text
+    typed after ``#`` as the component value (``query``/``query_id``), the
+    rerun reads it from ``st.session_state[key]`` before rendering and sends
+    back at most QUERY_LIMIT matches from ``search``.
+
     Parameters
     ----------
     items       : list of dicts with keys ``name``, ``id``, ``type``
     base_url    : elabFTW base URL, e.g. ``https://eln.ub.tum.de``
     value       : initial textarea content (applied only on first render)
     placeholder : placeholder text shown when textarea is empty
-    key         : Streamlit component key
+    key         : Streamlit component key (required in query mode)
+    search      : ``search(query, limit) -> list of item dicts``; enables query mode
+    item_count  : total number of resources, shown in the dropdown in query mode
 
     Returns
     -------
     dict ``{text: str, submitted: bool}`` or ``None`` before first interaction.
+    In query mode the dict may also carry ``query`` and ``query_id``.
     """
+    results, results_for = [], None
+    if search is not None:
+        state = st.session_state.get(key) if key is not None else None
+        if isinstance(state, dict) and state.get("query") is not None:
+            results_for = state.get("query_id")
+            try:
+                results = search(state["query"], QUERY_LIMIT)[:QUERY_LIMIT]
+            except Exception:
+                results = []
     return _hashtag_textarea_func(
-        items=items,
+        items=[] if search is not None else (items or []),
         base_url=base_url,
         value=value,
         placeholder=placeholder,
         reset_key=reset_key,
+        query_mode=search is not None,
+        results=results,
+        results_for=results_for,
+        item_count=item_count,
+        debounce_ms=QUERY_DEBOUNCE_MS,
         key=key,
         default=None,
     )
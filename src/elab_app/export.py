@@ -0,0 +1,185 @@
+"""export.py — Concurrent export of log rows in a date range.
+
+Used by the "Download logs by timespan" dialog on the Open page.  Entries are
+fetched by a bounded thread pool; each finished entry is trimmed to the rows in
+the chosen date range and written straight into a zip file on disk, so neither
+the responses nor the archive are held in memory as a whole.
+
+Only entries modified since the start of the range are fetched (see
+shortlist_entries).  The zip is written to ``<save_path>.part`` and moved into
+place once complete.
+"""
+
+import datetime
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import zipfile
+
+import elabapi_python
+
+from metrics import action, bind
+from utils import LogTable, build_log_table, iter_experiments, iter_items, _LIST_PAGE_SIZE
+
+EXPORT_WORKERS = 8   # concurrent entry fetches
+EXPORT_TIMEOUT = 30  # seconds per request
+# modified_at is server time (UTC) but row timestamps are local, so an entry
+# whose rows start just after local midnight can be dated the day before
+MODIFIED_SLACK = datetime.timedelta(days=1)
+
+
+def _modified_date(summary):
+    try:
+        return datetime.datetime.fromisoformat(summary.modified_at).date()
+    except (TypeError, ValueError):
+        return None
+
+
+def shortlist_entries(api_client, entity_type, from_date, page_size=_LIST_PAGE_SIZE):
+    """Yield (entity_type, name, id) for entries that can hold rows on or after from_date.
+
+    A row can only be dated in the range if the entry was modified on or after
+    from_date, so entries last modified earlier are skipped without fetching
+    their body.  modified_at is compared with one day of slack
+    (MODIFIED_SLACK) for the offset between server and local time; the rows
+    are filtered by date afterwards anyway.  The listing is requested newest-modified first
+    (order=lastchange) and reading stops after a full page of consecutive older
+    entries — unless the server turns out not to honour the ordering, in which
+    case every summary is checked.  Entries without a readable modified_at are
+    always kept.
+    """
+    iter_fn = iter_items if entity_type == 'items' else iter_experiments
+    summaries = iter_fn(api_client, page_size=page_size, summary=True, log_terms=False,
+                        order='lastchange', sort='desc')
+    since = from_date - MODIFIED_SLACK
+    prev = None
+    ordered = True
+    n_older = 0
+    for summary in summaries:
+        modified = _modified_date(summary)
+        if modified is None:
+            yield entity_type, summary.title, summary.id
+            continue
+        if prev is not None and modified > prev:
+            ordered = False
+        prev = modified
+        if modified >= since:
+            n_older = 0
+            yield entity_type, summary.title, summary.id
+            continue
+        n_older += 1
+        if ordered and n_older >= page_size:
+            return
+
+
+def _trim_body(html, log, filtered_rows):
+    """Replace every log table in html with a table containing only filtered_rows."""
+    if not log.spans:
+        return html
+    new_table = build_log_table(filtered_rows)
+    first_s, first_e = log.spans[0]
+    parts = [html[:first_s], new_table]
+    prev = first_e
+    for s, e in log.spans[1:]:
+        parts.append(html[prev:s])
+        prev = e
+    parts.append(html[prev:])
+    return ''.join(parts)
+
+
+def _export_entry(api_client, fetch_fn, name, eid, from_date, to_date, timeout):
+    """Fetch one entry and trim it to the date range (runs in a worker thread).
+
+    Returns (status, member_name, json_text); status is 'included',
+    'no_table' or 'no_rows'.
+    """
+    data = fetch_fn(eid, _request_timeout=timeout)
+    payload = api_client.sanitize_for_serialization(data)
+
+    # Find which body field(s) contain log tables — check both 'body' and 'body_html'
+    logs = {k: LogTable(payload.get(k) or '') for k in ('body', 'body_html') if k in payload}
+    body_keys_with_tables = [k for k, log in logs.items() if log.spans]
+    if not body_keys_with_tables:
+        return 'no_table', None, None
+
+    # Use the first field found to parse rows (they should be identical)
+    filtered = logs[body_keys_with_tables[0]].rows_between(from_date, to_date)
+    if not filtered:
+        return 'no_rows', None, None
+
+    # Trim every body field that has log tables
+    for k in body_keys_with_tables:
+        payload[k] = _trim_body(payload[k] or '', logs[k], filtered)
+
+    safe = re.sub(r'[\\/:*?"<>|]', '_', name)[:80]
+    return 'included', f'{safe}_{eid}.json', json.dumps(payload, indent=2, ensure_ascii=False, default=str)
+
+
+@action('export timespan')
+def export_timespan(api_client, entries, from_date, to_date, save_path,
+                    workers=EXPORT_WORKERS, timeout=EXPORT_TIMEOUT, on_progress=None):
+    """Export the log rows of *entries* dated within [from_date, to_date] as a zip.
+
+    Keyword arguments:
+    api_client -- elabapi_python api_client instance
+    entries -- iterable of (entity_type, name, id) tuples to export
+    from_date, to_date -- datetime.date bounds (inclusive)
+    save_path -- path of the zip file to write
+    workers -- number of concurrent fetches
+    timeout -- per-request timeout in seconds
+    on_progress -- optional callback(done, total, name), called from the calling thread
+
+    Returns:
+    dict with included, skipped_no_table, skipped_no_rows and errors (list of str).
+    The zip is only kept when at least one entry was included.
+    """
+    entries = list(entries)
+    total = len(entries)
+    result = {'included': 0, 'skipped_no_table': 0, 'skipped_no_rows': 0, 'errors': []}
+    fetchers = {
+        'experiments': elabapi_python.ExperimentsApi(api_client).get_experiment,
+        'items': elabapi_python.ItemsApi(api_client).get_item,
+    }
+
+    os.makedirs(os.path.dirname(os.path.abspath(save_path)), exist_ok=True)
+    part_path = save_path + '.part'
+    done = 0
+    try:
+        with zipfile.ZipFile(part_path, 'w', compression=zipfile.ZIP_DEFLATED) as zf, \
+                ThreadPoolExecutor(max_workers=workers) as pool:
+            pending = {}
+            todo = iter(entries)
+            # keep at most 2 × workers results in flight so memory stays bounded
+            while True:
+                for entity_type, name, eid in todo:
+                    fut = pool.submit(bind(_export_entry), api_client, fetchers[entity_type],
+                                      name, eid, from_date, to_date, timeout)
+                    pending[fut] = (entity_type, name, eid)
+                    if len(pending) >= 2 * workers:
+                        break
+                if not pending:
+                    break
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    entity_type, name, eid = pending.pop(fut)
+                    done += 1
+                    try:
+                        status, member, text = fut.result()
+                    except Exception as exc:
+                        folder = 'resources' if entity_type == 'items' else 'experiments'
+                        result['errors'].append(f'**{name}** ({folder}/{eid}): `{type(exc).__name__}: {exc}`')
+                    else:
+                        if status == 'included':
+                            zf.writestr(member, text)
+                            result['included'] += 1
+                        else:
+                            result['skipped_' + status] += 1
+                    if on_progress is not None:
+                        on_progress(done, total, name)
+        if result['included']:
+            os.replace(part_path, save_path)
+    finally:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+    return result
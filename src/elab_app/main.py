@@ -1,5 +1,7 @@
+import json
 from pathlib import Path
 
+import pandas as pd
 import streamlit as st
 from warnings import filterwarnings
 
@@ -9,9 +11,13 @@ from auth import (
     user_exists,
     save_key,
     load_key,
-    fetch_user_info,
+    lock_key,
     build_api_client_from_session,
+    DEBUG_PANEL,
 )
+from metrics import get_metrics
+from outbox import start_replay
+from warmup import LoginWarmup
 
 filterwarnings("ignore")
 
@@ -123,9 +129,11 @@ def login_dialog():
                 st.error("Incorrect PIN — please try again.")
                 st.stop()
 
-            # Fetch display name & teams from elabFTW
+            # Fetch display name & teams from elabFTW; catalogues, categories
+            # and the user directory load alongside (warmup.py)
+            warmup = LoginWarmup(api_key)
             try:
-                info = fetch_user_info(api_key)
+                info = warmup.user_info()
             except Exception as e:
                 st.error(f"Could not connect to elabFTW: {e}")
                 st.stop()
@@ -134,11 +142,12 @@ def login_dialog():
             # Dialogs cannot be nested, so we stage the credentials in session
             # state and rerun — the main script will open team_dialog next cycle.
             if len(info["teams"]) > 1:
-                st.session_state["_pending_login"] = {"api_key": api_key, "info": info, "short_name": short_name}
+                st.session_state["_pending_login"] = {"api_key": api_key, "info": info,
+                                                      "short_name": short_name, "warmup": warmup}
                 st.rerun()
             else:
                 team = info["teams"][0] if info["teams"] else {"id": 0, "name": ""}
-                _complete_login(api_key, info, team, short_name)
+                _complete_login(api_key, info, team, short_name, warmup)
 
     # ── Set-up flow ──────────────────────────────────────────────────────────
     if setup_clicked:
@@ -155,8 +164,9 @@ def login_dialog():
                 st.error(e)
         else:
             # Verify the API key works and fetch user info
+            warmup = LoginWarmup(api_key_input)
             try:
-                info = fetch_user_info(api_key_input)
+                info = warmup.user_info()
             except Exception as e:
                 st.error(f"Could not connect to elabFTW with that API key: {e}")
                 st.stop()
@@ -174,11 +184,12 @@ def login_dialog():
             )
 
             if len(info["teams"]) > 1:
-                st.session_state["_pending_login"] = {"api_key": api_key_input, "info": info, "short_name": short_name}
+                st.session_state["_pending_login"] = {"api_key": api_key_input, "info": info,
+                                                      "short_name": short_name, "warmup": warmup}
                 st.rerun()
             else:
                 team = info["teams"][0] if info["teams"] else {"id": 0, "name": ""}
-                _complete_login(api_key_input, info, team, short_name)
+                _complete_login(api_key_input, info, team, short_name, warmup)
 
 
 @st.dialog("Select team")
@@ -214,13 +225,17 @@ def team_dialog(api_key: str, info: dict):
 
     if submitted:
         chosen = next(t for t in teams if t["name"] == chosen_name)
-        short_name = st.session_state.get("_pending_login", {}).get("short_name", "")
-        st.session_state.pop("_pending_login", None)
-        _complete_login(api_key, info, chosen, short_name)
+        pending = st.session_state.pop("_pending_login", None) or {}
+        _complete_login(api_key, info, chosen, pending.get("short_name", ""), pending.get("warmup"))
 
 
-def _complete_login(api_key: str, info: dict, team: dict, short_name: str = ""):
-    """Store all login state in session and rerun to dismiss the dialog."""
+def _complete_login(api_key: str, info: dict, team: dict, short_name: str = "", warmup=None):
+    """Store all login state in session and rerun to dismiss the dialog.
+
+    With a LoginWarmup, the metadata it has fetched by then goes into the
+    session caches first, so the first page renders without further API calls;
+    fetches still running are stored on later reruns.
+    """
     st.session_state["api_key"] = api_key
     st.session_state["api_client"] = build_api_client_from_session(api_key)
     st.session_state["fullname"] = info["fullname"]
@@ -232,6 +247,8 @@ def _complete_login(api_key: str, info: dict, team: dict, short_name: str = ""):
     st.session_state["team_id"] = team["id"]
     st.session_state["initials"] = short_name
     st.session_state["prompt"] = None
+    if warmup is not None and not warmup.store():
+        st.session_state["_login_warmup"] = warmup
     st.rerun()
 
 
@@ -249,6 +266,10 @@ if "api_client" not in st.session_state:
     login_dialog()
     st.stop()
 
+# login-time fetches that finished after the login rerun (warmup.py)
+if "_login_warmup" in st.session_state and st.session_state["_login_warmup"].store(timeout=0):
+    del st.session_state["_login_warmup"]
+
 # ── Logged-in header ──────────────────────────────────────────────────────────
 
 st.write("# Welcome to the ElabFTW log app!")
@@ -265,9 +286,63 @@ if exp_name:
 col_info, col_btn = st.columns([5, 1])
 col_info.info(info_text)
 if col_btn.button("Log out", use_container_width=True):
+    lock_key(st.session_state.get("initials", ""))   # the next login needs the full PIN derivation
     st.session_state.clear()
     st.rerun()
 
+# ── API metrics (debug panel) ─────────────────────────────────────────────────
+
+def _metrics_panel(metrics):
+    """Sidebar panel with the API calls of the previous rerun, per action and per endpoint."""
+    snap = metrics.snapshot()
+    with st.sidebar.expander("🔧 API metrics"):
+        total = snap["total"]
+        st.caption(f"Session: **{total['calls']}** calls · {total['seconds']:.2f} s · "
+                   f"{total['bytes_in'] / 1e6:.2f} MB in · {total['bytes_out'] / 1e6:.2f} MB out")
+        if len(snap["reruns"]) > 1:
+            prev = snap["reruns"][-2]
+            st.caption(f"Previous rerun: **{prev['calls']}** calls · {prev['seconds']:.2f} s")
+            if prev["endpoints"]:
+                st.dataframe(pd.Series(prev["endpoints"], name="calls"), use_container_width=True)
+
+        if snap["actions"]:
+            st.markdown("**Per action**")
+            st.dataframe(pd.DataFrame([
+                {"action": name, "runs": a["invocations"], "calls/run": a["calls_per_invocation"],
+                 "s total": round(a["seconds"], 3), "KB in": round(a["bytes_in"] / 1e3, 1)}
+                for name, a in snap["actions"].items()
+            ]).set_index("action"), use_container_width=True)
+
+        if snap["endpoints"]:
+            st.markdown("**Per endpoint**")
+            st.dataframe(pd.DataFrame([
+                {"endpoint": key, "calls": e["calls"], "errors": e["errors"],
+                 "ms avg": round(1000 * e["seconds"] / max(e["calls"], 1), 1),
+                 "KB in": round(e["bytes_in"] / 1e3, 1), "KB out": round(e["bytes_out"] / 1e3, 1)}
+                for key, e in snap["endpoints"].items()
+            ]).set_index("endpoint"), use_container_width=True)
+
+        col_json, col_prom = st.columns(2)
+        col_json.download_button("JSON", json.dumps(snap, indent=2), file_name="elab_api_metrics.json",
+                                 mime="application/json", use_container_width=True)
+        col_prom.download_button("Prometheus", metrics.to_prometheus(), file_name="elab_api_metrics.prom",
+                                 mime="text/plain", use_container_width=True)
+
+
+_metrics = get_metrics(st.session_state["api_client"])
+if _metrics is not None:
+    _metrics.begin_rerun()
+    if DEBUG_PANEL:
+        _metrics_panel(_metrics)
+
+# ── Offline outbox ────────────────────────────────────────────────────────────
+
+# re-send log rows whose earlier write failed, off the script thread; entries
+# that still fail back off
+sent = start_replay(st.session_state["api_client"], st.session_state.get("initials", ""))
+if sent:
+    st.toast(f"📮 Re-sent {sent} queued log row{'s' if sent != 1 else ''} to elabFTW.")
+
 # ── Page navigation ───────────────────────────────────────────────────────────
 
 main_page = st.Page("pages/main_page.py", title="Open")
@@ -0,0 +1,275 @@
+"""metrics.py — Round-trip counter and latency histograms for the elabFTW client.
+
+``instrument(api_client)`` wraps the client's REST layer, so every HTTP call
+the app makes — from the script thread, the write-behind queue or a worker
+pool — is recorded with its endpoint, latency and payload sizes in
+``api_client.metrics`` (an ApiMetrics).
+
+Calls are aggregated three ways:
+
+* per endpoint (``GET /experiments/{id}``), for the whole session;
+* per Streamlit rerun — main.py calls ``begin_rerun()`` at the top of every
+  run, calls made while it lasts (including by background threads) count
+  towards it;
+* per user action — ``with action('name'):`` (or ``@action('name')``)
+  labels the calls made inside it.  The label is thread-local; ``bind(fn)``
+  carries it into worker threads.
+
+``snapshot()`` returns everything as a JSON-ready dict, ``to_prometheus()``
+as Prometheus text exposition format.
+"""
+
+import json
+import re
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)  # seconds
+RECENT_RERUNS = 20   # reruns kept for the debug panel
+
+_local = threading.local()
+_invocations = iter(range(1, 10**12))
+
+
+# ── Action labels ─────────────────────────────────────────────────────────────
+
+@contextmanager
+def action(name):
+    """Attribute the API calls made inside the block (on this thread) to *name*.
+
+    Usable as a decorator too.  The outermost label wins, so a button handler
+    can name the whole user action while the utils it calls carry fallbacks.
+    """
+    prev = getattr(_local, 'action', None)
+    if prev is None:
+        _local.action = (name, next(_invocations))
+    try:
+        yield
+    finally:
+        _local.action = prev
+
+
+def bind(fn):
+    """Wrap fn so it runs under the caller's current action label (for worker threads)."""
+    label = getattr(_local, 'action', None)
+    if label is None:
+        return fn
+
+    def _bound(*args, **kwargs):
+        prev = getattr(_local, 'action', None)
+        _local.action = label
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _local.action = prev
+    return _bound
+
+
+# ── Aggregation ───────────────────────────────────────────────────────────────
+
+class _Stats:
+    """Count, errors, total latency, payload bytes and latency histogram."""
+
+    __slots__ = ('count', 'errors', 'seconds', 'bytes_out', 'bytes_in', 'buckets')
+
+    def __init__(self):
+        self.count = self.errors = 0
+        self.seconds = 0.0
+        self.bytes_out = self.bytes_in = 0
+        self.buckets = [0] * len(LATENCY_BUCKETS)   # non-cumulative; +Inf is count
+
+    def add(self, seconds, bytes_out, bytes_in, error):
+        self.count += 1
+        self.errors += error
+        self.seconds += seconds
+        self.bytes_out += bytes_out
+        self.bytes_in += bytes_in
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+                break
+
+    def to_dict(self):
+        return {
+            'calls':     self.count,
+            'errors':    self.errors,
+            'seconds':   round(self.seconds, 6),
+            'bytes_out': self.bytes_out,
+            'bytes_in':  self.bytes_in,
+            'histogram': dict(zip([str(b) for b in LATENCY_BUCKETS] + ['+Inf'],
+                                  self.buckets + [self.count - sum(self.buckets)])),
+        }
+
+
+def _endpoint(url, prefix):
+    """'https://host/api/v2/experiments/42/uploads?x=1' → '/experiments/{id}/uploads'."""
+    path = urlsplit(url).path
+    if prefix and path.startswith(prefix):
+        path = path[len(prefix):]
+    return re.sub(r'/\d+(?=/|$)', '/{id}', path) or '/'
+
+
+def _request_bytes(body, post_params):
+    if body is not None:
+        return len(body if isinstance(body, str) else json.dumps(body))
+    n = 0
+    for _, value in post_params or ():
+        if isinstance(value, tuple) and len(value) > 1:   # (filename, data, mime)
+            n += len(value[1] or b'')
+        else:
+            n += len(str(value))
+    return n
+
+
+def _response_bytes(resp):
+    # never read a streamed (_preload_content=False) body here — the caller does
+    headers = getattr(resp, 'headers', None)
+    if headers is None:
+        headers = resp.getheaders()
+    length = headers.get('Content-Length')
+    if length is not None:
+        return int(length)
+    if hasattr(resp, 'urllib3_response'):   # preloaded RESTResponse
+        return len(resp.data or b'')
+    return 0
+
+
+class ApiMetrics:
+    """Thread-safe store of the API calls made through one ApiClient."""
+
+    def __init__(self, host=''):
+        self.prefix = urlsplit(host).path.rstrip('/')
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.total = _Stats()
+        self.endpoints = {}                     # 'GET /experiments/{id}' -> _Stats
+        self.actions = {}                       # name -> {'stats', 'invocations', 'endpoints', 'last'}
+        self.reruns = deque(maxlen=RECENT_RERUNS)
+        self.rerun = 0
+        self.begin_rerun()
+
+    def begin_rerun(self):
+        """Start a new rerun bucket; called at the top of every Streamlit run."""
+        with self.lock:
+            self.rerun += 1
+            self.reruns.append({'rerun': self.rerun, 'started': time.time(),
+                                'stats': _Stats(), 'endpoints': Counter()})
+
+    def record(self, method, url, seconds, bytes_out, bytes_in, error):
+        key = f'{method} {_endpoint(url, self.prefix)}'
+        label = getattr(_local, 'action', None)
+        with self.lock:
+            self.total.add(seconds, bytes_out, bytes_in, error)
+            self.endpoints.setdefault(key, _Stats()).add(seconds, bytes_out, bytes_in, error)
+            current = self.reruns[-1]
+            current['stats'].add(seconds, bytes_out, bytes_in, error)
+            current['endpoints'][key] += 1
+            if label is not None:
+                name, invocation = label
+                entry = self.actions.setdefault(
+                    name, {'stats': _Stats(), 'invocations': 0, 'endpoints': Counter(), 'last': None})
+                if entry['last'] != invocation:
+                    entry['invocations'] += 1
+                    entry['last'] = invocation
+                entry['stats'].add(seconds, bytes_out, bytes_in, error)
+                entry['endpoints'][key] += 1
+
+    # ── export ────────────────────────────────────────────────────────────────
+
+    def snapshot(self):
+        """All metrics as a JSON-serialisable dict."""
+        with self.lock:
+            return {
+                'started':   self.started,
+                'buckets_s': list(LATENCY_BUCKETS),
+                'total':     self.total.to_dict(),
+                'endpoints': {k: s.to_dict() for k, s in sorted(self.endpoints.items())},
+                'actions':   {
+                    name: dict(a['stats'].to_dict(), invocations=a['invocations'],
+                               calls_per_invocation=round(a['stats'].count / max(a['invocations'], 1), 2),
+                               endpoints=dict(a['endpoints']))
+                    for name, a in sorted(self.actions.items())
+                },
+                'reruns':    [dict(r['stats'].to_dict(), rerun=r['rerun'], started=r['started'],
+                                   endpoints=dict(r['endpoints']))
+                              for r in self.reruns],
+            }
+
+    def to_prometheus(self):
+        """Per-endpoint counters and latency histograms in Prometheus text format."""
+        def esc(v):
+            return str(v).replace('\\', '\\\\').replace('"', '\\"')
+
+        lines = [
+            '# HELP elab_api_requests_total HTTP requests made to the elabFTW API.',
+            '# TYPE elab_api_requests_total counter',
+        ]
+        with self.lock:
+            endpoints = sorted(self.endpoints.items())
+            for key, s in endpoints:
+                method, path = key.split(' ', 1)
+                lines.append(f'elab_api_requests_total{{method="{method}",endpoint="{esc(path)}"}} {s.count}')
+            lines += ['# HELP elab_api_request_errors_total Requests that raised or returned an error status.',
+                      '# TYPE elab_api_request_errors_total counter']
+            for key, s in endpoints:
+                method, path = key.split(' ', 1)
+                lines.append(f'elab_api_request_errors_total{{method="{method}",endpoint="{esc(path)}"}} {s.errors}')
+            lines += ['# HELP elab_api_request_bytes_total Payload bytes sent and received.',
+                      '# TYPE elab_api_request_bytes_total counter']
+            for key, s in endpoints:
+                method, path = key.split(' ', 1)
+                labels = f'method="{method}",endpoint="{esc(path)}"'
+                lines.append(f'elab_api_request_bytes_total{{{labels},direction="out"}} {s.bytes_out}')
+                lines.append(f'elab_api_request_bytes_total{{{labels},direction="in"}} {s.bytes_in}')
+            lines += ['# HELP elab_api_request_duration_seconds Latency of elabFTW API requests.',
+                      '# TYPE elab_api_request_duration_seconds histogram']
+            for key, s in endpoints:
+                method, path = key.split(' ', 1)
+                labels = f'method="{method}",endpoint="{esc(path)}"'
+                cumulative = 0
+                for bound, n in zip(LATENCY_BUCKETS, s.buckets):
+                    cumulative += n
+                    lines.append(f'elab_api_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'elab_api_request_duration_seconds_bucket{{{labels},le="+Inf"}} {s.count}')
+                lines.append(f'elab_api_request_duration_seconds_sum{{{labels}}} {s.seconds:.6f}')
+                lines.append(f'elab_api_request_duration_seconds_count{{{labels}}} {s.count}')
+        return '\n'.join(lines) + '\n'
+
+
+# ── Client wrapper ────────────────────────────────────────────────────────────
+
+def instrument(api_client):
+    """Record every request made through api_client in api_client.metrics; returns the client."""
+    if getattr(api_client, 'metrics', None) is not None:
+        return api_client
+    metrics = ApiMetrics(getattr(api_client.configuration, 'host', ''))
+    rest = api_client.rest_client
+    request = rest.request
+
+    def _instrumented(method, url, query_params=None, headers=None, body=None,
+                      post_params=None, _preload_content=True, _request_timeout=None):
+        bytes_out = _request_bytes(body, post_params)
+        t0 = time.perf_counter()
+        try:
+            resp = request(method, url, query_params=query_params, headers=headers, body=body,
+                           post_params=post_params, _preload_content=_preload_content,
+                           _request_timeout=_request_timeout)
+        except Exception as exc:
+            metrics.record(method.upper(), url, time.perf_counter() - t0, bytes_out,
+                           len(getattr(exc, 'body', None) or b''), True)
+            raise
+        metrics.record(method.upper(), url, time.perf_counter() - t0, bytes_out,
+                       _response_bytes(resp), False)
+        return resp
+
+    rest.request = _instrumented
+    api_client.metrics = metrics
+    return api_client
+
+
+def get_metrics(api_client):
+    """Return the ApiMetrics of an instrumented client, or None."""
+    return getattr(api_client, 'metrics', None)
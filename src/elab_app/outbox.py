@@ -0,0 +1,197 @@
+"""outbox.py — Durable offline outbox for log rows that could not be written.
+
+When an append fails (network down, elabFTW unreachable, …) its rows are
+stored in a small SQLite database in the config directory, so they survive a
+closed browser tab or an app restart.  ``start_replay`` is called on every
+rerun of the logged-in app and runs ``replay_outbox`` in a worker thread, so
+an unreachable elabFTW never holds up the page; the replay re-sends due rows
+in one ``bulk_append_to_experiment`` call per entry and backs off
+exponentially per entry while elabFTW stays unreachable.
+
+Rows are unique per (host, owner, entry, timestamp, content, initials), so a
+row that fails repeatedly is stored once, and replaying a row that already
+reached elabFTW is harmless (the merge skips exact duplicates).
+
+The outbox and the Session History are kept in step: rows the replay delivers
+are no longer shown as failed in the session log, and a successful
+"↩ Re-send" from the Session History removes the row from the outbox
+(``remove_rows``).  Rows are matched by entry, timestamp and initials.
+"""
+
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import streamlit as st
+from platformdirs import user_config_dir
+
+from metrics import action
+
+OUTBOX_PATH = Path(user_config_dir("elab_app")) / "outbox.sqlite3"
+
+BACKOFF_BASE = 15        # seconds before the first retry
+BACKOFF_MAX = 30 * 60    # cap between retries
+REPLAY_BATCH = 5         # entries re-sent per call of replay_outbox
+REPLAY_WORKERS = 4       # replays running at once, across all sessions
+
+_POOL = ThreadPoolExecutor(max_workers=REPLAY_WORKERS, thread_name_prefix='elab_outbox')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id           INTEGER PRIMARY KEY AUTOINCREMENT,
+    host         TEXT    NOT NULL,
+    owner        TEXT    NOT NULL,
+    entity_type  TEXT    NOT NULL,
+    exp_id       INTEGER NOT NULL,
+    exp_name     TEXT,
+    ts           TEXT    NOT NULL,
+    content_html TEXT    NOT NULL,
+    initials     TEXT    NOT NULL,
+    app_version  TEXT    NOT NULL,
+    attempts     INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL    NOT NULL DEFAULT 0,
+    last_error   TEXT,
+    UNIQUE (host, owner, entity_type, exp_id, ts, content_html, initials)
+)
+"""
+
+
+def _connect():
+    OUTBOX_PATH.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(OUTBOX_PATH, timeout=10)
+    conn.execute(_SCHEMA)
+    return conn
+
+
+def _host(api_client):
+    return getattr(getattr(api_client, 'configuration', None), 'host', '')
+
+
+def add_rows(api_client, owner, exp_id, entity_type, rows, exp_name='', error=None):
+    """Persist failed log rows; safe to call from any thread.
+
+    Keyword arguments:
+    api_client -- elabapi_python api_client instance the rows were sent with
+    owner -- local user (initials of the key file) the rows belong to
+    exp_id -- id of the target experiment or item
+    entity_type -- 'experiments' or 'items'
+    rows -- list of (timestamp_str, content_html, initials, app_version)
+    exp_name -- title of the entry, for display
+    error -- the error that made the write fail
+    """
+    first_try = time.time() + BACKOFF_BASE
+    with _connect() as conn:
+        conn.executemany(
+            "INSERT OR IGNORE INTO outbox (host, owner, entity_type, exp_id, exp_name, ts,"
+            " content_html, initials, app_version, next_attempt, last_error)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(_host(api_client), owner, entity_type, exp_id, exp_name, *row, first_try, error)
+             for row in rows],
+        )
+    conn.close()
+
+
+def remove_rows(api_client, owner, exp_id, entity_type, rows):
+    """Drop rows that have been written some other way (e.g. re-sent by hand).
+
+    rows -- list of (timestamp_str, initials)
+    """
+    with _connect() as conn:
+        conn.executemany(
+            "DELETE FROM outbox WHERE host = ? AND owner = ? AND entity_type = ? AND exp_id = ?"
+            " AND ts = ? AND initials = ?",
+            [(_host(api_client), owner, entity_type, exp_id, ts, initials) for ts, initials in rows],
+        )
+    conn.close()
+
+
+def _clear_failed(session_log, entity_type, exp_id, rows):
+    # rows the replay delivered are no longer failed in this session's history
+    delivered = {(ts, initials) for ts, _, initials, _ in rows}
+    for record in session_log:
+        if (record.get('failed') and record.get('entity_type') == entity_type
+                and record.get('exp_id') == exp_id
+                and (record.get('timestamp'), record.get('initials')) in delivered):
+            record.update(failed=False, error=None)
+
+
+def pending_count(api_client, owner):
+    """Number of rows of *owner* waiting in the outbox for this host."""
+    with _connect() as conn:
+        (n,) = conn.execute("SELECT COUNT(*) FROM outbox WHERE host = ? AND owner = ?",
+                            (_host(api_client), owner)).fetchone()
+    conn.close()
+    return n
+
+
+@action('outbox replay')
+def replay_outbox(api_client, owner, max_entries=REPLAY_BATCH, session_log=()):
+    """Re-send due outbox rows of *owner*, one bulk merge per entry.
+
+    Safe to call from any thread: delivered rows are marked as no longer
+    failed in *session_log* (the session's list of records), not through
+    st.session_state.
+    Returns (rows_sent, rows_still_waiting).
+    """
+    from utils import bulk_append_to_experiment   # utils persists failures here
+
+    host = _host(api_client)
+    now = time.time()
+    with _connect() as conn:
+        due = conn.execute(
+            "SELECT entity_type, exp_id, MAX(attempts) FROM outbox"
+            " WHERE host = ? AND owner = ? AND next_attempt <= ?"
+            " GROUP BY entity_type, exp_id ORDER BY MIN(id) LIMIT ?",
+            (host, owner, now, max_entries),
+        ).fetchall()
+    conn.close()
+
+    sent = 0
+    for entity_type, exp_id, attempts in due:
+        with _connect() as conn:
+            found = conn.execute(
+                "SELECT id, ts, content_html, initials, app_version FROM outbox"
+                " WHERE host = ? AND owner = ? AND entity_type = ? AND exp_id = ? ORDER BY id",
+                (host, owner, entity_type, exp_id),
+            ).fetchall()
+        conn.close()
+        ids = [r[0] for r in found]
+        rows = [tuple(r[1:]) for r in found]
+        _, _, err = bulk_append_to_experiment(api_client, exp_id, rows,
+                                              entity_type=entity_type, record=False)
+        with _connect() as conn:
+            marks = ','.join('?' * len(ids))
+            if err is None:
+                conn.execute(f"DELETE FROM outbox WHERE id IN ({marks})", ids)
+                sent += len(ids)
+                _clear_failed(session_log, entity_type, exp_id, rows)
+            else:
+                delay = min(BACKOFF_BASE * 2 ** (attempts + 1), BACKOFF_MAX)
+                conn.execute(
+                    f"UPDATE outbox SET attempts = attempts + 1, next_attempt = ?, last_error = ?"
+                    f" WHERE id IN ({marks})",
+                    [time.time() + delay, err, *ids],
+                )
+        conn.close()
+    return sent, pending_count(api_client, owner)
+
+
+def start_replay(api_client, owner):
+    """Run replay_outbox for this session in the background.
+
+    Call from the script thread on every rerun: a replay is started unless the
+    previous one is still running.  Returns the number of rows the previous
+    replay sent (0 while it runs or if it failed, e.g. database locked).
+    """
+    sent = 0
+    future = st.session_state.get('_outbox_replay')
+    if future is not None:
+        if not future.done():
+            return 0
+        if future.exception() is None:
+            sent = future.result()[0]
+    session_log = st.session_state.setdefault('session_log', [])
+    st.session_state['_outbox_replay'] = _POOL.submit(
+        replay_outbox, api_client, owner, session_log=session_log)
+    return sent
@@ -2,8 +2,9 @@ import streamlit as st
 import pandas as pd
 import datetime
 from warnings import filterwarnings
-from utils import get_items, append_to_experiment, bulk_append_to_experiment
+from utils import get_catalogue, item_suggestions, append_to_experiment, bulk_append_to_experiment
 from version import LOG_SCHEMA_VERSION
+from outbox import pending_count, remove_rows
 import markdown as md
 import pages.templates as templates
 from pages.create_transcript import transcription_widget
@@ -22,21 +23,19 @@ st.header('Add a comment to the notebook')
 exp_chat = st.expander("Chat mode")
 
 with exp_chat:
-    # Reuse items list cached by main_page; fallback-fetch if missing
-    if 'all_items' not in st.session_state:
-        try:
-            _names, _ids, _ = get_items(st.session_state.api_client)
-            st.session_state['all_items'] = [
-                {'name': n, 'id': i, 'type': 'items'} for n, i in zip(_names, _ids)
-            ]
-        except Exception:
-            st.session_state['all_items'] = []
-
     if 'chat_reset_key' not in st.session_state:
         st.session_state['chat_reset_key'] = 0
 
+    # Query mode: resources are matched in Python (search index over the
+    # cached catalogue) instead of sending the whole list to the browser
+    try:
+        _n_items = len(get_catalogue(st.session_state.api_client, 'items')[1])
+    except Exception:
+        _n_items = 0
+
     result = hashtag_textarea(
-        items=st.session_state['all_items'],
+        search=lambda query, limit: item_suggestions(st.session_state.api_client, query, limit),
+        item_count=_n_items,
         base_url=_BASE_URL,
         placeholder="Add a comment… (type # to link a resource, Ctrl+Enter to submit)",
         reset_key=st.session_state['chat_reset_key'],
@@ -50,6 +49,7 @@ with exp_chat:
             result['text'].strip(),
             entity_type=entity_type,
             initials=st.session_state.get('initials', ''),
+            background=True,
         )
         if ok:
             st.success("✅ Comment added.")
@@ -155,71 +155,100 @@ with exp_csv:
 
 
 # ── Session log ───────────────────────────────────────────────────────────────
-session_log = st.session_state.get('session_log', [])
-
-if session_log:
-    st.divider()
-    n_failed = sum(1 for e in session_log if e.get('failed'))
-    header = "Session History"
-    if n_failed:
-        header += f" — ⚠️ {n_failed} failed"
-    st.subheader(header)
-
-    # Group by experiment/resource, preserving insertion order
-    seen_names = []
-    groups = {}
-    for entry in session_log:
-        name = entry['exp_name']
-        if name not in groups:
-            groups[name] = {'entity_type': entry['entity_type'], 'rows': []}
-            seen_names.append(name)
-        groups[name]['rows'].append(entry)
-
-    for name in seen_names:
-        g = groups[name]
-        label = 'Resource' if g['entity_type'] == 'items' else 'Experiment'
-        st.markdown(f"**{label}: {name}**")
-
-        df_rows = [{'ISO time': e['timestamp'], 'Log': e['content'], 'Initials': e['initials']}
-                   for e in g['rows']]
-        df = pd.DataFrame(df_rows)
-
-        # Colour failed rows red using pandas Styler
-        row_failed = [e.get('failed', False) for e in g['rows']]
-        def _style_rows(row, _flags=row_failed):
-            if _flags[row.name]:
-                return ['background-color: #ffd6d6; color: #7a0000'] * len(row)
-            return [''] * len(row)
-
-        st.dataframe(df.style.apply(_style_rows, axis=1),
-                     use_container_width=True, hide_index=True)
-
-        # Re-send panel for failed entries
-        failed_in_group = [(i, e) for i, e in enumerate(g['rows']) if e.get('failed')]
-        if failed_in_group:
-            with st.expander(f"⚠️ {len(failed_in_group)} failed entr{'y' if len(failed_in_group)==1 else 'ies'} — click to re-send or copy"):
-                for i, e in failed_in_group:
-                    st.markdown(f"**{e['timestamp']}**  \n`{e.get('error', 'unknown error')}`")
-                    st.code(e['content'], language=None)
-                    col_r, col_s = st.columns([1, 4])
-                    if col_r.button("↩ Re-send", key=f"resend_{name}_{i}"):
-                        ok = append_to_experiment(
-                            st.session_state.api_client,
-                            e['exp_id'],
-                            e['content'],
-                            custom_timestamp=e['timestamp'],
-                            entity_type=e['entity_type'],
-                            initials=e['initials'],
-                        )
-                        if ok:
-                            # mark original entry as resolved and remove the duplicate just added
-                            e['failed'] = False
-                            e['error'] = None
-                            # remove the re-send duplicate from session_log
-                            if st.session_state['session_log'][-1].get('failed') is False:
+HISTORY_REFRESH = 1  # seconds between redraws while background writes are pending
+
+
+def _session_history():
+    session_log = st.session_state.get('session_log', [])
+    if _history_pending and not any(e.get('pending') for e in session_log):
+        # the writer is done — rerun the page so the fragment stops polling
+        st.rerun()
+
+    if session_log:
+        st.divider()
+        n_failed = sum(1 for e in session_log if e.get('failed'))
+        n_pending = sum(1 for e in session_log if e.get('pending'))
+        header = "Session History"
+        if n_failed:
+            header += f" — ⚠️ {n_failed} failed"
+        if n_pending:
+            header += f" — ⏳ {n_pending} being written"
+        st.subheader(header)
+        n_outbox = pending_count(st.session_state.api_client, st.session_state.get('initials', ''))
+        if n_outbox:
+            st.caption(f"📮 {n_outbox} failed row{'s' if n_outbox != 1 else ''} kept in the offline outbox — "
+                       "they are re-sent automatically once elabFTW is reachable again.")
+
+        # Group by experiment/resource, preserving insertion order
+        seen_names = []
+        groups = {}
+        for entry in session_log:
+            name = entry['exp_name']
+            if name not in groups:
+                groups[name] = {'entity_type': entry['entity_type'], 'rows': []}
+                seen_names.append(name)
+            groups[name]['rows'].append(entry)
+
+        for name in seen_names:
+            g = groups[name]
+            label = 'Resource' if g['entity_type'] == 'items' else 'Experiment'
+            st.markdown(f"**{label}: {name}**")
+
+            df_rows = [{'ISO time': e['timestamp'], 'Log': e['content'], 'Initials': e['initials']}
+                       for e in g['rows']]
+            df = pd.DataFrame(df_rows)
+
+            # Colour failed rows red and rows still queued grey using pandas Styler
+            row_failed = [e.get('failed', False) for e in g['rows']]
+            row_pending = [e.get('pending', False) for e in g['rows']]
+            def _style_rows(row, _flags=row_failed, _pending=row_pending):
+                if _flags[row.name]:
+                    return ['background-color: #ffd6d6; color: #7a0000'] * len(row)
+                if _pending[row.name]:
+                    return ['color: #888888; font-style: italic'] * len(row)
+                return [''] * len(row)
+
+            st.dataframe(df.style.apply(_style_rows, axis=1),
+                         use_container_width=True, hide_index=True)
+
+            # Re-send panel for failed entries
+            failed_in_group = [(i, e) for i, e in enumerate(g['rows']) if e.get('failed')]
+            if failed_in_group:
+                with st.expander(f"⚠️ {len(failed_in_group)} failed entr{'y' if len(failed_in_group)==1 else 'ies'} — click to re-send or copy"):
+                    for i, e in failed_in_group:
+                        st.markdown(f"**{e['timestamp']}**  \n`{e.get('error', 'unknown error')}`")
+                        st.code(e['content'], language=None)
+                        col_r, col_s = st.columns([1, 4])
+                        if col_r.button("↩ Re-send", key=f"resend_{name}_{i}"):
+                            ok = append_to_experiment(
+                                st.session_state.api_client,
+                                e['exp_id'],
+                                e['content'],
+                                custom_timestamp=e['timestamp'],
+                                entity_type=e['entity_type'],
+                                initials=e['initials'],
+                            )
+                            if ok:
+                                # mark original entry as resolved and remove the duplicate just added
+                                e['failed'] = False
+                                e['error'] = None
+                                # the row is written — drop its copy from the offline outbox
+                                try:
+                                    remove_rows(st.session_state.api_client, st.session_state.get('initials', ''),
+                                                e['exp_id'], e['entity_type'], [(e['timestamp'], e['initials'])])
+                                except Exception:
+                                    pass   # a replay of the copy is harmless: the merge skips duplicates
+                                # remove the re-send duplicate from session_log
+                                if st.session_state['session_log'][-1].get('failed') is False:
+                                    st.session_state['session_log'].pop()
+                                st.rerun()
+                            else:
+                                # remove the duplicate failed entry just added by append_to_experiment
                                 st.session_state['session_log'].pop()
-                            st.rerun()
-                        else:
-                            # remove the duplicate failed entry just added by append_to_experiment
-                            st.session_state['session_log'].pop()
-                            st.error("Still failing — check elabFTW permissions.")
+                                st.error("Still failing — check elabFTW permissions.")
+
+
+# While rows are still being written in the background, the history redraws
+# itself every HISTORY_REFRESH seconds so their status updates without a click.
+_history_pending = any(e.get('pending') for e in st.session_state.get('session_log', []))
+st.fragment(run_every=HISTORY_REFRESH if _history_pending else None)(_session_history)()
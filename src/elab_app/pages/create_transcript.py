@@ -8,7 +8,9 @@ from pathlib import Path
 from datetime import datetime
 
 import streamlit as st
-from utils import append_to_experiment
+import markdown as md
+from utils import append_to_experiment, bulk_append_to_experiment, get_catalogue, item_suggestions
+from version import LOG_SCHEMA_VERSION
 from auth import ELAB_HOST
 from components.hashtag_textarea import hashtag_textarea
 
@@ -317,7 +319,8 @@ def upload_to_experiment(transcript_content, include_timestamps=False):
                 # Parse timestamped transcription and upload each block separately
                 if '[' in transcript_content and ']' in transcript_content:
                     lines = transcript_content.strip().split('\n')
-                    any_ok = False
+                    initials = st.session_state.get('initials', '')
+                    rows = []
                     for line in lines:
                         line = line.strip()
                         if not line or not line.startswith('['):
@@ -348,21 +351,23 @@ def upload_to_experiment(transcript_content, include_timestamps=False):
                                 hours, minutes, seconds = map(int, time_parts)
                                 full_datetime = datetime.combine(today, datetime.min.time().replace(hour=hours, minute=minutes, second=seconds))
                                 formatted_timestamp = full_datetime.strftime('%Y-%m-%dT%H:%M:%S')
-
-                                # Upload with custom timestamp
-                                if append_to_experiment(st.session_state.api_client, st.session_state.exp_id, text, custom_timestamp=formatted_timestamp, entity_type=entity_type, initials=st.session_state.get('initials', '')):
-                                    any_ok = True
+                                rows.append((formatted_timestamp, md.markdown(text), initials, LOG_SCHEMA_VERSION))
 
                         except (ValueError, IndexError):
                             # If parsing fails, skip this line
                             continue
-                    return any_ok
+
+                    # Upload all lines in one merge (one GET + one PATCH for the whole transcript)
+                    if not rows:
+                        return False
+                    _, _, err = bulk_append_to_experiment(st.session_state.api_client, st.session_state.exp_id, rows, entity_type=entity_type)
+                    return err is None
                 else:
                     # No timestamps found, upload as plain text with current timestamp
-                    return append_to_experiment(st.session_state.api_client, st.session_state.exp_id, transcript_content, entity_type=entity_type, initials=st.session_state.get('initials', ''))
+                    return append_to_experiment(st.session_state.api_client, st.session_state.exp_id, transcript_content, entity_type=entity_type, initials=st.session_state.get('initials', ''), background=True)
             else:
                 # Upload plain text with current timestamp (default behavior)
-                return append_to_experiment(st.session_state.api_client, st.session_state.exp_id, transcript_content, entity_type=entity_type, initials=st.session_state.get('initials', ''))
+                return append_to_experiment(st.session_state.api_client, st.session_state.exp_id, transcript_content, entity_type=entity_type, initials=st.session_state.get('initials', ''), background=True)
 
     except Exception as e:
         st.error(f"❌ Error uploading to experiment: {str(e)}")
@@ -635,8 +640,13 @@ def transcription_widget(key_suffix="", on_upload_callback=None, compact_mode=Fa
             _, plain_content = load_transcription_with_formatting(False)
             initial_value = get_timestamped_text_for_editing(False) if use_ts else plain_content
 
+            try:
+                n_items = len(get_catalogue(st.session_state.api_client, 'items')[1])
+            except Exception:
+                n_items = 0
             editor_result = hashtag_textarea(
-                items=st.session_state.get('all_items', []),
+                search=lambda query, limit: item_suggestions(st.session_state.api_client, query, limit),
+                item_count=n_items,
                 base_url=_BASE_URL,
                 value=initial_value,
                 placeholder="Edit transcription… (type # to link a resource, Ctrl+Enter to upload)",
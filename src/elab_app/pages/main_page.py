@@ -1,18 +1,15 @@
-import io
-import re
-import zipfile
 import streamlit as st
-import elabapi_python
 import datetime
 import json
 import os
 import tomllib
 from pathlib import Path
 from utils import (
-    get_experiments, get_items, build_log_table, parse_log_rows,
+    get_entry, get_catalogue, invalidate_catalogue, search_catalogue,
     get_exp_info, check_log_compatibility, bulk_append_to_experiment,
-    _find_all_log_tables,
 )
+from metrics import action
+from export import export_timespan, shortlist_entries, EXPORT_WORKERS, EXPORT_TIMEOUT
 from version import LOG_SCHEMA_VERSION
 from platformdirs import user_config_dir
 
@@ -38,13 +35,7 @@ def download_dialog(exp_id: int, exp_name: str, entity_type: str):
 
     if st.button('Save', type='primary', use_container_width=True):
         try:
-            if entity_type == 'items':
-                api = elabapi_python.ItemsApi(st.session_state.api_client)
-                data = api.get_item(exp_id)
-            else:
-                api = elabapi_python.ExperimentsApi(st.session_state.api_client)
-                data = api.get_experiment(exp_id)
-
+            data = get_entry(st.session_state.api_client, exp_id, entity_type=entity_type)
             payload = st.session_state.api_client.sanitize_for_serialization(data)
             os.makedirs(os.path.dirname(os.path.abspath(save_path)), exist_ok=True)
             with open(save_path, 'w', encoding='utf-8') as f:
@@ -81,6 +72,13 @@ def download_timespan_dialog():
         value=os.path.join(os.path.expanduser('~'), 'Downloads', default_name),
     )
 
+    with st.expander('Advanced'):
+        col_w, col_t = st.columns(2)
+        workers = col_w.number_input('Parallel downloads', min_value=1, max_value=32,
+                                     value=EXPORT_WORKERS)
+        timeout = col_t.number_input('Request timeout (s)', min_value=1, max_value=600,
+                                     value=EXPORT_TIMEOUT)
+
     if not st.button('Create zip & save', type='primary', use_container_width=True):
         return
 
@@ -91,104 +89,42 @@ def download_timespan_dialog():
 
     api_client = st.session_state.api_client
 
+    # Shortlist from the compact listing: only entries modified since from_date
+    # can hold rows in range, so only those are fetched in full.
     try:
-        exp_names, exp_ids, exp_entries = get_experiments(api_client)
+        with action('export timespan'):
+            jobs = list(shortlist_entries(api_client, 'experiments', from_date))
     except Exception as exc:
         st.error(f'Could not fetch experiments: {exc}')
         return
     try:
-        item_names, item_ids, item_entries = get_items(api_client)
+        with action('export timespan'):
+            jobs += list(shortlist_entries(api_client, 'items', from_date))
     except Exception as exc:
         st.error(f'Could not fetch resources: {exc}')
         return
 
-    total = len(exp_entries) + len(item_entries)
-    if total == 0:
-        st.warning('No entries found.')
+    if not jobs:
+        st.warning(f'No entries were modified on or after {from_date}.')
         return
 
     progress = st.progress(0, text='Starting…')
-    buf = io.BytesIO()
-    included = 0
-    skipped_no_table = 0
-    skipped_no_rows = 0
-    errors = []
-
-    def _trim_body(html, filtered_rows):
-        """Replace every log table in html with a table containing only filtered_rows."""
-        tables = _find_all_log_tables(html)
-        if not tables:
-            return html
-        new_table = build_log_table(filtered_rows)
-        first_s, first_e = tables[0]
-        parts = [html[:first_s], new_table]
-        prev = first_e
-        for s, e in tables[1:]:
-            parts.append(html[prev:s])
-            prev = e
-        parts.append(html[prev:])
-        return ''.join(parts)
-
-    def _add_entry(zf, name, eid, folder, fetch_fn, prog_idx):
-        nonlocal included, skipped_no_table, skipped_no_rows
-        progress.progress((prog_idx + 1) / total, text=f'Processing: {name}')
-        try:
-            data = fetch_fn(eid)
-            payload = api_client.sanitize_for_serialization(data)
-
-            # Find which body field(s) contain log tables — check both 'body' and 'body_html'
-            body_keys_with_tables = [
-                k for k in ('body', 'body_html')
-                if k in payload and _find_all_log_tables(payload.get(k) or '')
-            ]
-            if not body_keys_with_tables:
-                skipped_no_table += 1
-                return
-
-            # Use the first field found to parse rows (they should be identical)
-            primary_key = body_keys_with_tables[0]
-            primary_body = payload[primary_key] or ''
-            primary_tables = _find_all_log_tables(primary_body)
-            all_rows = []
-            for s, e in primary_tables:
-                all_rows.extend(parse_log_rows(primary_body[s:e]))
-
-            filtered = []
-            for row in all_rows:
-                try:
-                    row_date = datetime.datetime.fromisoformat(row[0]).date()
-                    if from_date <= row_date <= to_date:
-                        filtered.append(row)
-                except (ValueError, TypeError):
-                    pass
-
-            if not filtered:
-                skipped_no_rows += 1
-                return
-
-            # Trim every body field that has log tables
-            for k in body_keys_with_tables:
-                payload[k] = _trim_body(payload[k] or '', filtered)
-
-            safe = re.sub(r'[\\/:*?"<>|]', '_', name)[:80]
-            zf.writestr(
-                f'{safe}_{eid}.json',
-                json.dumps(payload, indent=2, ensure_ascii=False, default=str),
-            )
-            included += 1
-        except Exception as exc:
-            errors.append(f'**{name}** ({folder}/{eid}): `{type(exc).__name__}: {exc}`')
 
-    exp_api  = elabapi_python.ExperimentsApi(api_client)
-    item_api = elabapi_python.ItemsApi(api_client)
+    def _on_progress(done, total, name):
+        progress.progress(done / total, text=f'Processing: {name}')
 
-    with zipfile.ZipFile(buf, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
-        for i, (name, eid) in enumerate(zip(exp_names, exp_ids)):
-            _add_entry(zf, name, eid, 'experiments', exp_api.get_experiment, i)
-        for i, (name, eid) in enumerate(zip(item_names, item_ids)):
-            _add_entry(zf, name, eid, 'resources', item_api.get_item, len(exp_entries) + i)
+    try:
+        result = export_timespan(api_client, jobs, from_date, to_date, save_path,
+                                 workers=workers, timeout=timeout, on_progress=_on_progress)
+    except Exception as exc:
+        st.error(f'Could not save file: {exc}')
+        return
 
     progress.progress(1.0, text='Done!')
+    included = result['included']
+    skipped_no_table = result['skipped_no_table']
+    skipped_no_rows = result['skipped_no_rows']
+    errors = result['errors']
 
     # ── Diagnostics ───────────────────────────────────────────────────────────
     if errors:
@@ -197,6 +133,7 @@ def download_timespan_dialog():
                 st.markdown(f'- {msg}')
     if skipped_no_table or skipped_no_rows:
         st.caption(
+            f'{len(jobs)} modified since {from_date} · '
             f'{skipped_no_table} had no log table · '
             f'{skipped_no_rows} had no rows in range · '
             f'{included} included'
@@ -206,14 +143,7 @@ def download_timespan_dialog():
         st.warning('No entries had log rows in the selected date range.')
         return
 
-    # ── Save directly (no rerun — keeps the dialog open) ──────────────────────
-    try:
-        os.makedirs(os.path.dirname(os.path.abspath(save_path)), exist_ok=True)
-        with open(save_path, 'wb') as fh:
-            fh.write(buf.getvalue())
-        st.success(f'✅ Saved {included} entr{"y" if included == 1 else "ies"} to `{save_path}`')
-    except Exception as exc:
-        st.error(f'Could not save file: {exc}')
+    st.success(f'✅ Saved {included} entr{"y" if included == 1 else "ies"} to `{save_path}`')
 
 
 st.title ("eLabFTW Log")
@@ -232,20 +162,29 @@ entity_type = st.radio(
 )
 st.session_state['entity_type'] = entity_type
 
-if entity_type == 'experiments':
-    names, ids, entries = get_experiments(st.session_state.api_client)
-    page_base = 'experiments.php'
-else:
-    names, ids, entries = get_items(st.session_state.api_client)
-    st.session_state['all_items'] = [
-        {'name': n, 'id': i, 'type': 'items'} for n, i in zip(names, ids)
-    ]
-    page_base = 'database.php'
+if st.button('🔄 Refresh list', help='Reload the entry list from elabFTW'):
+    invalidate_catalogue(st.session_state.api_client, entity_type)
+
+names, ids, entries = get_catalogue(st.session_state.api_client, entity_type)
+page_base = 'experiments.php' if entity_type == 'experiments' else 'database.php'
 
 if names == []:
     entry_label = 'experiment' if entity_type == 'experiments' else 'resource'
     st.write('No %ss available. Create a new %s first!' % (entry_label, entry_label))
 else:
+    query = st.text_input(
+        'Search', key=f'entry_search_{entity_type}',
+        placeholder='🔎 Search titles, categories, tags (#tag) and log text',
+        label_visibility='collapsed',
+    )
+    if query.strip():
+        hits = search_catalogue(st.session_state.api_client, entity_type, query)
+        if hits:
+            names, ids = [e.title for e in hits], [e.id for e in hits]
+            st.caption(f'{len(hits)} best match(es) of {len(entries)}')
+        else:
+            st.caption(f'No entry matches "{query}" — showing all {len(entries)}.')
+
     label = 'Experiment title:' if entity_type == 'experiments' else 'Resource title:'
     saved_name = st.session_state.get('exp_name', '')
     default_index = names.index(saved_name) if saved_name in names else 0
@@ -265,11 +204,13 @@ else:
     if st.button('Download all logs during timespan', use_container_width=True):
         download_timespan_dialog()
 
-    entry = entries[names.index(exp_name)]
-    st.markdown(get_exp_info(st.session_state.api_client, entry))
+    # the listing only holds summaries — load the full body for the selected entry
+    with action('open entry'):
+        entry = get_entry(st.session_state.api_client, exp_id, entity_type=entity_type)
+        st.markdown(get_exp_info(st.session_state.api_client, entry))
 
     # ── elab-app log compatibility check ─────────────────────────────────────
-    compat = check_log_compatibility(entry.body)
+    compat = check_log_compatibility(entry.body, entry_id=exp_id)
 
     if compat['status'] == 'no_table':
         st.info(
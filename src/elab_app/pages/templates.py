@@ -35,6 +35,7 @@ def _append(prompt: str):
         prompt,
         entity_type=entity_type,
         initials=st.session_state.get('initials', ''),
+        background=True,
     )
     if ok:
         entry_label = 'experiment' if entity_type == 'experiments' else 'resource'
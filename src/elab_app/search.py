@@ -0,0 +1,177 @@
+"""search.py — In-memory search index over the entry catalogue.
+
+``SearchIndex`` maps words to the catalogue entries (EntrySummary records)
+that contain them, in the title, the category, the tags or the text of the
+log-table rows.  A query matches entries that contain every query word as a
+word or as the prefix of one; a word with no prefix match at all is matched
+fuzzily (edit distance 1, or 2 for words of 6 letters and more), so typos
+still find the entry.  ``#word`` only matches tags.
+
+Results are ranked by where the words were found (title before tags before
+category before log text), then by how well (exact, prefix, fuzzy), then by
+most recently modified.
+
+``sync(entries)`` brings the index up to date with a catalogue listing
+incrementally: unchanged entries are skipped, changed ones re-indexed and
+vanished ones removed.  utils.search_catalogue keeps one index per cached
+catalogue.
+"""
+
+import bisect
+import heapq
+import html
+import re
+import sys
+
+FIELD_WEIGHTS = {'title': 8, 'tags': 4, 'category': 2, 'log': 1}
+MATCH_WEIGHTS = {'exact': 1.0, 'prefix': 0.75, 'fuzzy': 0.5}
+MAX_EXPANSIONS = 500   # index words a single query word may expand to
+MIN_FUZZY_LEN = 3      # shorter query words are only prefix-matched
+
+_WORD_RE = re.compile(r'\w+')
+_QUERY_RE = re.compile(r'#?\w+')
+_TAG_RE = re.compile(r'<[^>]+>')
+
+
+def terms(text):
+    """Lower-case words of *text* (HTML tags and entities removed), interned."""
+    if not text:
+        return []
+    text = html.unescape(_TAG_RE.sub(' ', text)).lower()
+    return [sys.intern(w) for w in _WORD_RE.findall(text)]
+
+
+def _fuzzy_prefix_distance(word, term, limit):
+    """Edit distance between *word* and the closest prefix of *term*, capped at limit + 1."""
+    term = term[:len(word) + limit]
+    prev = list(range(len(term) + 1))
+    for i, c in enumerate(word, 1):
+        cur = [i] + [0] * len(term)
+        for j, t in enumerate(term, 1):
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (c != t))
+        if min(cur) > limit:
+            return limit + 1
+        prev = cur
+    return min(prev)
+
+
+class SearchIndex:
+    """Inverted index over EntrySummary records, keyed by entry id."""
+
+    def __init__(self):
+        self._postings = {}     # word -> {entry id: field weight}
+        self._entries = {}      # entry id -> (EntrySummary, indexed words)
+        self._words = []        # sorted keys of _postings, rebuilt when stale
+        self._stale = False
+        self._listing = None    # last listing passed to sync()
+
+    def __len__(self):
+        return len(self._entries)
+
+    # ── updates ───────────────────────────────────────────────────────────────
+
+    def update(self, entry):
+        """Index *entry*, replacing an older version; returns False if unchanged."""
+        old = self._entries.get(entry.id)
+        if old is not None:
+            if old[0] == entry:
+                return False
+            self.remove(entry.id)
+
+        weights = {}
+        fields = [('title', terms(entry.title)), ('category', terms(entry.category)),
+                  ('log', entry.log_terms)]
+        for tag in entry.tags:
+            words = terms(tag)
+            fields.append(('tags', words + [sys.intern('#' + w) for w in words]))
+        for field, words in fields:
+            weight = FIELD_WEIGHTS[field]
+            for w in words:
+                if weights.get(w, 0) < weight:
+                    weights[w] = weight
+
+        for w, weight in weights.items():
+            postings = self._postings.get(w)
+            if postings is None:
+                postings = self._postings[w] = {}
+                self._stale = True
+            postings[entry.id] = weight
+        self._entries[entry.id] = (entry, tuple(weights))
+        return True
+
+    def remove(self, entry_id):
+        """Drop an entry from the index (no-op if it is not indexed)."""
+        old = self._entries.pop(entry_id, None)
+        if old is None:
+            return
+        for w in old[1]:
+            postings = self._postings[w]
+            del postings[entry_id]
+            if not postings:
+                del self._postings[w]
+                self._stale = True
+
+    def sync(self, entries):
+        """Make the index match a catalogue listing; returns the number of changes."""
+        if entries is self._listing:
+            return 0
+        changed = 0
+        seen = set()
+        for entry in entries:
+            seen.add(entry.id)
+            changed += self.update(entry)
+        for entry_id in [i for i in self._entries if i not in seen]:
+            self.remove(entry_id)
+            changed += 1
+        self._listing = entries
+        return changed
+
+    # ── queries ───────────────────────────────────────────────────────────────
+
+    def _expand(self, word):
+        """Index words matching query *word*, with their MATCH_WEIGHTS."""
+        if self._stale:
+            self._words = sorted(self._postings)
+            self._stale = False
+        words = self._words
+        matches = {}
+        if word in self._postings:
+            matches[word] = MATCH_WEIGHTS['exact']
+        i = bisect.bisect_left(words, word)
+        while i < len(words) and words[i].startswith(word) and len(matches) < MAX_EXPANSIONS:
+            matches.setdefault(words[i], MATCH_WEIGHTS['prefix'])
+            i += 1
+        if matches or len(word.lstrip('#')) < MIN_FUZZY_LEN:
+            return matches
+
+        # fuzzy: only words sharing the first letter (after '#'), for speed
+        head = word[:2] if word.startswith('#') else word[:1]
+        limit = 1 if len(word.lstrip('#')) < 6 else 2
+        i = bisect.bisect_left(words, head)
+        while i < len(words) and words[i].startswith(head) and len(matches) < MAX_EXPANSIONS:
+            if _fuzzy_prefix_distance(word, words[i], limit) <= limit:
+                matches[words[i]] = MATCH_WEIGHTS['fuzzy']
+            i += 1
+        return matches
+
+    def search(self, query, limit=50):
+        """Return up to *limit* EntrySummary records matching *query*, best first."""
+        scores = None
+        for word in dict.fromkeys(_QUERY_RE.findall(query.lower())):
+            word_scores = {}
+            for w, match_weight in self._expand(word).items():
+                for entry_id, field_weight in self._postings[w].items():
+                    score = field_weight * match_weight
+                    if score > word_scores.get(entry_id, 0):
+                        word_scores[entry_id] = score
+            if scores is None:
+                scores = word_scores
+            else:
+                scores = {i: s + word_scores[i] for i, s in scores.items() if i in word_scores}
+            if not scores:
+                return []
+        if scores is None:
+            return []
+        best = heapq.nlargest(limit, scores.items(),
+                              key=lambda kv: (kv[1], self._entries[kv[0]][0].modified_at or ''))
+        return [self._entries[entry_id][0] for entry_id, _ in best]
@@ -1,10 +1,20 @@
 import re
+import json
+import random
+import hashlib
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from collections import namedtuple, OrderedDict
 import streamlit as st
 from version import LOG_SCHEMA_VERSION, LOG_SCHEMA_APP, LOG_SCHEMA_URL
 import elabapi_python
 import datetime
+import time
 from PIL import Image
 import markdown as md
+from metrics import action, bind
+from search import SearchIndex, terms
 
 def _attr(obj, key):
     """Read *key* from either an object (attribute) or a dict — handles both
@@ -26,9 +36,7 @@ def append_to_experiment_old(api_client, exp_id, content):
     content = content.replace('\n','<br>') # add line break
     
     # get current content of the experiment
-    names, ids, exps = get_experiments(api_client)
-    ind = ids.index(exp_id)
-    current_content = exps[ind].body
+    current_content = get_entry(api_client, exp_id).body
     
     # add new content
     new_content = '<br>'.join([current_content,content])
@@ -39,7 +47,9 @@ def append_to_experiment_old(api_client, exp_id, content):
     experimentsApi.patch_experiment(body={'body': new_content}, id=exp_id)
     return True
 
-def append_to_experiment(api_client, exp_id, content, custom_timestamp=None, entity_type='experiments', initials=''):
+@action('append log row')
+def append_to_experiment(api_client, exp_id, content, custom_timestamp=None, entity_type='experiments', initials='',
+                         background=False):
     """Append a time stamped comment to an ElabFTW entry
     in a tabular format
 
@@ -50,6 +60,9 @@ def append_to_experiment(api_client, exp_id, content, custom_timestamp=None, ent
     custom_timestamp -- optional custom timestamp string (if None, uses current time)
     entity_type -- 'experiments' or 'items' (default: 'experiments')
     initials -- user initials to record in the third column (default: '')
+    background -- if True, hand the row to the session's write-behind queue
+                  (see writer.py) and return without waiting for elabFTW;
+                  the outcome appears in the session log (default: False)
     """
 
     # Use custom timestamp if provided, otherwise use current time
@@ -61,6 +74,28 @@ def append_to_experiment(api_client, exp_id, content, custom_timestamp=None, ent
 
     content_plain = content                 # keep original for session log
     content_html  = md.markdown(content)
+    new_row = (timestamp, content_html, initials, LOG_SCHEMA_VERSION)
+
+    if 'session_log' not in st.session_state:
+        st.session_state['session_log'] = []
+    record = {
+        'exp_name':    st.session_state.get('exp_name', str(exp_id)),
+        'exp_id':      exp_id,
+        'entity_type': entity_type,
+        'timestamp':   timestamp,
+        'content':     content_plain,
+        'initials':    initials,
+        'n_tables':    0,
+        'total_rows':  0,
+        'failed':      False,
+        'error':       None,
+    }
+
+    if background:
+        from writer import get_log_writer   # writer imports utils
+        st.session_state['session_log'].append(record)
+        get_log_writer(api_client).submit(exp_id, entity_type, new_row, record)
+        return True
 
     # fetch + merge + patch — wrap everything so any network/permission error is caught
     _failed = False
@@ -68,48 +103,26 @@ def append_to_experiment(api_client, exp_id, content, custom_timestamp=None, ent
     n_tables   = 0
     total_rows = 0
     try:
-        # get current content of the entry
-        if entity_type == 'items':
-            names, ids, entries = get_items(api_client)
-        else:
-            names, ids, entries = get_experiments(api_client)
-        current_content = entries[ids.index(exp_id)].body or ''
-
-        new_row = (timestamp, content_html, initials, LOG_SCHEMA_VERSION)
-        new_content, inserted, skipped, n_tables = _consolidate(current_content, [new_row])
-
-        if entity_type == 'items':
-            elabapi_python.ItemsApi(api_client).patch_item(body={'body': new_content}, id=exp_id)
-        else:
-            elabapi_python.ExperimentsApi(api_client).patch_experiment(body={'body': new_content}, id=exp_id)
+        new_content, inserted, skipped, n_tables = _merge_into_entry(
+            api_client, exp_id, [new_row], entity_type=entity_type)
 
         # mirror any elabFTW internal links in the log text as proper database links
-        _create_links_from_html(api_client, entity_type, exp_id, content_html)
+        _create_links_from_html(api_client, entity_type, exp_id, content_html, background=True)
 
         # count total rows in the locally-built content
-        all_tables = _find_all_log_tables(new_content)
-        total_rows = sum(len(parse_log_rows(new_content[s:e])) for s, e in all_tables)
+        total_rows = get_log_table(new_content, exp_id).n_rows
     except Exception as exc:
         _failed = True
         _error  = str(exc)
+        # keep the row on disk so it is re-sent once elabFTW is reachable again
+        _to_outbox(api_client, exp_id, entity_type, [new_row], record['exp_name'], _error)
 
     # always record in session log — failed entries are shown in red with a re-send button
-    if 'session_log' not in st.session_state:
-        st.session_state['session_log'] = []
-    st.session_state['session_log'].append({
-        'exp_name':    st.session_state.get('exp_name', str(exp_id)),
-        'exp_id':      exp_id,
-        'entity_type': entity_type,
-        'timestamp':   timestamp,
-        'content':     content_plain,
-        'initials':    initials,
-        'n_tables':    n_tables,
-        'total_rows':  total_rows,
-        'failed':      _failed,
-        'error':       _error,
-    })
+    record.update(n_tables=n_tables, total_rows=total_rows, failed=_failed, error=_error)
+    st.session_state['session_log'].append(record)
     return not _failed
 
+@action('upload image')
 def upload_image(api_client, exp_id, path, entity_type='experiments'):
     """upload image to an experiment or item entry
 
@@ -166,6 +179,7 @@ def get_image_content(upl, width=False, height=False):
     cont = '<p><img src="%s" width="%i" height="%i" ></p>'%(src, width, height)
     return cont
 
+@action('insert image')
 def insert_image(api_client, exp_id, name, entity_type='experiments', initials=''):
     """insert image into experiment or item entry
 
@@ -181,41 +195,400 @@ def insert_image(api_client, exp_id, name, entity_type='experiments', initials='
     cont = get_image_content(upls[ind])
     return append_to_experiment(api_client, exp_id, cont, entity_type=entity_type, initials=initials)
 
-def get_experiments(api_client):
+def get_entry(api_client, exp_id, entity_type='experiments'):
+    """read a single experiment or item by id
+
+    Keyword arguments:
+    api_client -- elabapi_python api_client instance
+    exp_id -- id of the elab entry of the experiment or item
+    entity_type -- 'experiments' or 'items' (default: 'experiments')
+
+    Returns:
+    entry -- full experiment or item entry (including its body)
+    """
+    if entity_type == 'items':
+        return elabapi_python.ItemsApi(api_client).get_item(exp_id)
+    return elabapi_python.ExperimentsApi(api_client).get_experiment(exp_id)
+
+def patch_entry(api_client, exp_id, body, entity_type='experiments', log_rows=()):
+    """patch fields of a single experiment or item
+
+    Keyword arguments:
+    api_client -- elabapi_python api_client instance
+    exp_id -- id of the elab entry of the experiment or item
+    body -- dict of fields to update, e.g. {'body': html}
+    entity_type -- 'experiments' or 'items' (default: 'experiments')
+    log_rows -- log rows this patch adds to the body, for the catalogue search
+    """
+    result = _patch_fields(api_client, exp_id, body, entity_type)
+    if set(body) == {'body'} and _attr(result, 'id') is not None:
+        # body only: the listing stays valid, just this entry's summary changes;
+        # the body is not parsed, only the added rows' words are
+        added = frozenset(w for row in log_rows for w in terms(row[1]))
+        update_catalogue_entry(api_client, entity_type, _summarize(result, log_terms=False), added)
+    else:
+        invalidate_catalogue(api_client, entity_type)
+    return result
+
+def _patch_fields(api_client, exp_id, body, entity_type):
+    # bare PATCH without touching session state — safe to call from worker threads
+    if entity_type == 'items':
+        return elabapi_python.ItemsApi(api_client).patch_item(body=body, id=exp_id)
+    return elabapi_python.ExperimentsApi(api_client).patch_experiment(body=body, id=exp_id)
+
+# Compact listing record: everything the entry selector and the search index
+# (search.py) need, without the body HTML — the log rows are kept only as the
+# set of words they contain
+EntrySummary = namedtuple('EntrySummary', ['id', 'title', 'category', 'modified_at', 'tags', 'log_terms'])
+
+_LIST_PAGE_SIZE = 200  # entries per request when paging through a listing
+
+
+def _tag_list(raw_tags):
+    # elabFTW lists tags as one '|'-separated string; tolerate a list as well
+    if not raw_tags:
+        return ()
+    if isinstance(raw_tags, str):
+        raw_tags = raw_tags.split('|')
+    return tuple(t.get('tag', '') if isinstance(t, dict) else str(t) for t in raw_tags)
+
+
+def _summarize(raw, log_terms=True, known=None):
+    # raw: listing JSON dict or an entry as returned by the API.  The log rows
+    # are only parsed for log_terms if the entry is not in *known* (summaries
+    # of an earlier listing, by id) with the same modified_at.
+    entry_id, modified_at = _attr(raw, 'id'), _attr(raw, 'modified_at')
+    words = frozenset()
+    if log_terms:
+        old = known.get(entry_id) if known else None
+        if old is not None and modified_at is not None and old.modified_at == modified_at:
+            words = old.log_terms
+        else:
+            body = _attr(raw, 'body') or ''
+            if _LOG_SIGNATURE in body:
+                words = frozenset(w for row in parse_log_rows(body) for w in terms(row[1]))
+    return EntrySummary(entry_id, _attr(raw, 'title'), _attr(raw, 'category_title'),
+                        modified_at, _tag_list(_attr(raw, 'tags')), words)
+
+
+def _iter_entries(api_client, entity_type, page_size=_LIST_PAGE_SIZE, summary=False,
+                  log_terms=True, known=None, **query):
+    """Page through the experiment/item listing with limit/offset, yielding lazily.
+
+    Only one page is held at a time.  In summary mode the raw JSON is read with
+    _preload_content=False and reduced to EntrySummary records straight away, so
+    no model objects or body HTML outlive the page they arrived in (the elabFTW
+    API has no field selection, so each page still transfers bodies).
+    Parsing the log rows for EntrySummary.log_terms is the costly part: it is
+    skipped with log_terms=False, and entries of *known* (EntrySummary records
+    by id) whose modified_at is unchanged keep their earlier log_terms.
+    Extra keyword arguments (q, order, sort, ...) are passed to the list call.
+    """
+    if entity_type == 'items':
+        read = elabapi_python.ItemsApi(api_client).read_items
+    else:
+        read = elabapi_python.ExperimentsApi(api_client).read_experiments
+    offset = 0
+    while True:
+        if summary:
+            page = json.loads(read(limit=page_size, offset=offset, _preload_content=False, **query).data)
+            yield from (_summarize(raw, log_terms, known) for raw in page)
+        else:
+            page = read(limit=page_size, offset=offset, **query) or []
+            yield from page
+        if len(page) < page_size:
+            return
+        offset += page_size
+
+
+def iter_experiments(api_client, page_size=_LIST_PAGE_SIZE, summary=False,
+                     log_terms=True, known=None, **query):
+    """iterate over all experiments, fetching one page per request
+
+    Keyword arguments:
+    api_client -- elabapi_python api_client instance
+    page_size -- number of experiments requested per page
+    summary -- if True, yield EntrySummary records instead of full entries
+    log_terms -- in summary mode, if False, leave log_terms empty (no body parsing)
+    known -- {id: EntrySummary} of an earlier listing; unchanged entries reuse its log_terms
+    query -- extra filters passed to read_experiments (e.g. q, order, sort)
+
+    Yields:
+    exp -- full experiment entry (or EntrySummary record)
+    """
+    return _iter_entries(api_client, 'experiments', page_size, summary, log_terms, known, **query)
+
+
+def iter_items(api_client, page_size=_LIST_PAGE_SIZE, summary=False,
+               log_terms=True, known=None, **query):
+    """iterate over all resources (items), fetching one page per request
+
+    Keyword arguments:
+    api_client -- elabapi_python api_client instance
+    page_size -- number of items requested per page
+    summary -- if True, yield EntrySummary records instead of full entries
+    log_terms -- in summary mode, if False, leave log_terms empty (no body parsing)
+    known -- {id: EntrySummary} of an earlier listing; unchanged entries reuse its log_terms
+    query -- extra filters passed to read_items (e.g. q, order, sort)
+
+    Yields:
+    item -- full item entry (or EntrySummary record)
+    """
+    return _iter_entries(api_client, 'items', page_size, summary, log_terms, known, **query)
+
+
+def get_experiments(api_client, summary=False, known=None):
     """read all experiments
 
     Keyword arguments:
     api_client -- elabapi_python api_client instance
+    summary -- if True, return compact EntrySummary records
+               (id, title, category, modified_at) instead of full entries
+    known -- {id: EntrySummary} of an earlier listing (see iter_experiments)
 
     Returns:
     names -- names of the experiments
     ids -- ids of the experiments
-    upls -- list of full experiment entries
+    upls -- list of full experiment entries (or EntrySummary records)
     """
-    experimentsApi = elabapi_python.ExperimentsApi(api_client)
-    exps = experimentsApi.read_experiments()
+    exps = list(iter_experiments(api_client, summary=summary, known=known))
     # existing ids 
     names = [exp.title for exp in exps]
     ids = [exp.id for exp in exps]
     return names, ids, exps
 
-def get_items(api_client):
+def get_items(api_client, summary=False, known=None):
     """read all resources (items)
 
     Keyword arguments:
     api_client -- elabapi_python api_client instance
+    summary -- if True, return compact EntrySummary records
+               (id, title, category, modified_at) instead of full entries
+    known -- {id: EntrySummary} of an earlier listing (see iter_items)
 
     Returns:
     names -- names of the items
     ids -- ids of the items
-    items -- list of full item entries
+    items -- list of full item entries (or EntrySummary records)
     """
-    itemsApi = elabapi_python.ItemsApi(api_client)
-    items = itemsApi.read_items()
+    items = list(iter_items(api_client, summary=summary, known=known))
     names = [item.title for item in items]
     ids = [item.id for item in items]
     return names, ids, items
 
+# ── Entry catalogue cache ─────────────────────────────────────────────────────
+# Every widget interaction reruns the page scripts, so the experiment/item
+# lists are cached in the Streamlit session instead of being downloaded on each
+# rerun.  Cache keys are (host, userid, team_id, entity_type); a listing expires
+# after CATALOGUE_TTL seconds and is dropped as soon as the app creates an entry
+# of that type or changes its title, category or other listed fields.
+# Invalidation only bumps a module-level epoch, so it is safe from worker
+# threads and reaches every session on the host.  A patch of the body alone
+# (every log append) leaves the listing valid: the entry's new summary is
+# recorded instead and swapped into each cached listing on its next read,
+# with the words of the added log rows joined to the listed log_terms.
+
+CATALOGUE_TTL = 300  # seconds
+METADATA_TTL = 3600  # seconds; categories and items types change rarely
+CATALOGUE_UPDATES_MAX = 1000  # patched summaries kept per host and type before falling back to invalidation
+
+_catalogue_epoch = itertools.count(1)
+_catalogue_invalidated = {}   # (host | None, entity_type | None) → epoch of last invalidation
+_catalogue_updates = {}       # (host, entity_type) → {entry id: (epoch, EntrySummary, added log terms)}
+_catalogue_lock = threading.Lock()
+
+
+def _catalogue_key(api_client, entity_type):
+    host = getattr(getattr(api_client, 'configuration', None), 'host', '')
+    return (host, st.session_state.get('userid'), st.session_state.get('team_id'), entity_type)
+
+
+def _catalogue_invalidated_at(host, entity_type):
+    with _catalogue_lock:
+        return max(_catalogue_invalidated.get(k, 0) for k in
+                   ((host, entity_type), (host, None), (None, entity_type), (None, None)))
+
+
+@action('load catalogue')
+def get_catalogue(api_client, entity_type='experiments', ttl=CATALOGUE_TTL):
+    """read all experiments or items, served from the session cache when fresh
+
+    Keyword arguments:
+    api_client -- elabapi_python api_client instance
+    entity_type -- 'experiments' or 'items' (default: 'experiments')
+    ttl -- maximum age of a cached listing in seconds
+
+    Returns:
+    names, ids, entries -- as returned by get_experiments / get_items with
+                           summary=True (entries are EntrySummary records)
+    """
+    if '_catalogue_cache' not in st.session_state:
+        st.session_state['_catalogue_cache'] = {}
+    cache = st.session_state['_catalogue_cache']
+    key = _catalogue_key(api_client, entity_type)
+    hit = cache.get(key)
+    if (hit is not None and time.monotonic() - hit[0] < ttl
+            and hit[1] > _catalogue_invalidated_at(key[0], entity_type)):
+        return _apply_catalogue_updates(cache, key, hit)
+    # entries unchanged since the previous listing keep their parsed log terms
+    known = {e.id: e for e in hit[2][2]} if hit is not None else None
+    cache[key] = fetch_catalogue(api_client, entity_type, known=known)
+    return cache[key][2]
+
+
+def _apply_catalogue_updates(cache, key, hit):
+    # swap in the summaries of entries patched since the listing was fetched
+    applied = st.session_state.setdefault('_catalogue_applied', {})
+    since = max(hit[1], applied.get(key, 0))
+    with _catalogue_lock:
+        updates = {i: u for i, u in _catalogue_updates.get((key[0], key[3]), {}).items() if u[0] > since}
+    if not updates:
+        return hit[2]
+    names, ids, entries = hit[2]
+    entries = [updates[e.id][1]._replace(log_terms=e.log_terms | updates[e.id][2])
+               if e.id in updates else e for e in entries]
+    # the fetch epoch stays, so later invalidations are still compared against it
+    applied[key] = max(u[0] for u in updates.values())
+    cache[key] = (hit[0], hit[1], (names, ids, entries))
+    return cache[key][2]
+
+
+def fetch_catalogue(api_client, entity_type='experiments', known=None):
+    """download a listing for the catalogue cache, without touching the session
+
+    Safe to call from worker threads; hand the result to prime_session_caches.
+    Log rows are only parsed (for the search index) in entries that are not in
+    *known* with the same modified_at.
+
+    Keyword arguments:
+    api_client -- elabapi_python api_client instance
+    entity_type -- 'experiments' or 'items' (default: 'experiments')
+    known -- {id: EntrySummary} of the previous listing, if any
+
+    Returns:
+    fetched -- (fetch time, epoch, (names, ids, entries)) cache record
+    """
+    now = time.monotonic()
+    epoch = next(_catalogue_epoch)   # taken before the fetch: a concurrent write marks it stale
+    if entity_type == 'items':
+        listing = get_items(api_client, summary=True, known=known)
+    else:
+        listing = get_experiments(api_client, summary=True, known=known)
+    return (now, epoch, listing)
+
+
+SEARCH_LIMIT = 50  # entries returned by search_catalogue
+
+
+def search_catalogue(api_client, entity_type, query, limit=SEARCH_LIMIT):
+    """search the cached catalogue by title, category, tags and log-row text
+
+    The session keeps one search index per catalogue; each call brings it up
+    to date with the current listing, re-indexing only entries that changed.
+
+    Keyword arguments:
+    api_client -- elabapi_python api_client instance
+    entity_type -- 'experiments' or 'items'
+    query -- words to find (prefix and typo tolerant); '#word' matches tags only
+    limit -- maximum number of results
+
+    Returns:
+    entries -- matching EntrySummary records, best match first
+    """
+    _names, _ids, entries = get_catalogue(api_client, entity_type)
+    indexes = st.session_state.setdefault('_search_index', {})
+    key = _catalogue_key(api_client, entity_type)
+    if key not in indexes:
+        indexes[key] = SearchIndex()
+    indexes[key].sync(entries)
+    return indexes[key].search(query, limit)
+
+
+def item_suggestions(api_client, query, limit=10):
+    """resources for the hashtag autocomplete, as the hashtag_textarea component expects
+
+    Keyword arguments:
+    api_client -- elabapi_python api_client instance
+    query -- text typed after '#' (empty: the first resources of the catalogue)
+    limit -- maximum number of suggestions
+
+    Returns:
+    items -- list of {'name', 'id', 'type'} dicts, best match first
+    """
+    if query.strip():
+        entries = search_catalogue(api_client, 'items', query, limit)
+    else:
+        entries = get_catalogue(api_client, 'items')[2][:limit]
+    return [{'name': e.title, 'id': e.id, 'type': 'items'} for e in entries]
+
+
+def invalidate_catalogue(api_client=None, entity_type=None):
+    """mark cached listings stale so the next get_catalogue call refetches them
+
+    Safe to call from any thread.
+
+    Keyword arguments:
+    api_client -- only drop listings for this client's host (default: all hosts)
+    entity_type -- only drop listings of this type (default: all types)
+    """
+    host = getattr(getattr(api_client, 'configuration', None), 'host', '') if api_client is not None else None
+    with _catalogue_lock:
+        _catalogue_invalidated[(host, entity_type)] = next(_catalogue_epoch)
+
+
+def update_catalogue_entry(api_client, entity_type, summary, added_terms=frozenset()):
+    """replace one entry's record in the cached listings without refetching them
+
+    For changes that do not affect which entries are listed or their titles
+    (e.g. a body patch).  Safe to call from any thread.
+
+    Keyword arguments:
+    api_client -- elabapi_python api_client instance
+    entity_type -- 'experiments' or 'items'
+    summary -- the entry's new EntrySummary; its log_terms are not used
+    added_terms -- words of the log rows added since the listed record
+    """
+    host = getattr(getattr(api_client, 'configuration', None), 'host', '')
+    with _catalogue_lock:
+        updates = _catalogue_updates.setdefault((host, entity_type), {})
+        old = updates.get(summary.id)
+        if old is not None:
+            added_terms = old[2] | added_terms   # listings that missed the earlier update
+        updates[summary.id] = (next(_catalogue_epoch), summary, added_terms)
+        if len(updates) > CATALOGUE_UPDATES_MAX:
+            updates.clear()
+            _catalogue_invalidated[(host, entity_type)] = next(_catalogue_epoch)
+
+def _id_from_location(response):
+    """Return the id of a newly created entry from a *_with_http_info POST response.
+
+    elabFTW answers a POST with 201 and a Location header pointing at the new
+    entry (…/api/v2/experiments/<id>).  Handles both the (data, status, headers)
+    tuple of older elabapi_python releases and the ApiResponse object of newer ones.
+    """
+    headers = response[2] if isinstance(response, tuple) else response.headers
+    location = headers.get('Location') or headers.get('location')
+    return int(location.rstrip('/').rsplit('/', 1)[-1])
+
+def _create_entry(api_client, entity_type, name, comment='', catid=0):
+    """POST a new entry and set its fields with one PATCH; returns the new id.
+
+    The single-request creation path shared by create_experiment, create_item
+    and create_experiments_bulk.  Does not touch session state.
+    """
+    if entity_type == 'items':
+        response = elabapi_python.ItemsApi(api_client).post_item_with_http_info(body={'category': catid})
+        fields = {'title': name}
+    else:
+        response = elabapi_python.ExperimentsApi(api_client).post_experiment_with_http_info()
+        fields = {'title': name, 'category': catid}
+    entry_id = _id_from_location(response)
+    if comment != '':
+        fields['body'] = comment
+    _patch_fields(api_client, entry_id, fields, entity_type)
+    return entry_id
+
+@action('create entry')
 def create_item(api_client, name, comment='', catid=0):
     """create a new resource (item) entry in elab
 
@@ -224,30 +597,35 @@ def create_item(api_client, name, comment='', catid=0):
     name -- name of the new item
     comment -- comment to add in the first line of the new entry
     catid -- id of the item category (items type)
+
+    Returns:
+    item_id -- id of the new item
     """
-    itemsApi = elabapi_python.ItemsApi(api_client)
-    itemsApi.post_item(body={'category': catid})
-    names, ids, items = get_items(api_client)
-    item_id = ids[names.index('Untitled')]
-    itemsApi.patch_item(body={'title': name}, id=item_id)
-    if comment != '':
-        itemsApi.patch_item(body={'body': comment}, id=item_id)
-    return True
+    item_id = _create_entry(api_client, 'items', name, comment, catid)
+    invalidate_catalogue(api_client, 'items')
+    return item_id
 
-def get_resource_categories(api_client):
-    """get all resource categories (items types) available
+def get_resource_categories(api_client, ttl=METADATA_TTL):
+    """get all resource categories (items types) available, cached per session
 
     Keyword arguments:
     api_client -- elabapi_python api_client instance
+    ttl -- maximum age of the cached list in seconds
 
     Returns:
     titles -- names of the categories
     ids -- ids of the categories
     """
+    return _cached_metadata(api_client, ('items_types',),
+                            lambda: read_resource_categories(api_client), ttl)
+
+def read_resource_categories(api_client):
+    """download the resource categories (items types); see get_resource_categories"""
     iapi = elabapi_python.ItemsTypesApi(api_client)
     cats = iapi.read_items_types()
     return [cat.title for cat in cats], [cat.id for cat in cats]
 
+@action('create entry')
 def create_experiment(api_client, name, comment='', catid = 0):
     """create a new experiment entry in elab
 
@@ -256,17 +634,113 @@ def create_experiment(api_client, name, comment='', catid = 0):
     name -- name of the new experiment 
     comment -- comment to add in the first line of the new entry
     catid -- id of the experiment category
+
+    Returns:
+    exp_id -- id of the new experiment
     """
-    experimentsApi = elabapi_python.ExperimentsApi(api_client)
-    experimentsApi.post_experiment()
-    names, ids, exps = get_experiments(api_client)
-    exp_id = ids[names.index('Untitled')]
-    experimentsApi.patch_experiment(body={'title': name}, id=exp_id)
-    if comment != '':
-        experimentsApi.patch_experiment(body={'body': comment}, id=exp_id)
-    experimentsApi.patch_experiment(body={'category': catid}, id=exp_id)
+    exp_id = _create_entry(api_client, 'experiments', name, comment, catid)
+    invalidate_catalogue(api_client, 'experiments')
 
-    return True
+    return exp_id
+
+CREATE_WORKERS = 4  # concurrent creations in create_experiments_bulk
+
+@action('create entries (bulk)')
+def create_experiments_bulk(api_client, specs, workers=CREATE_WORKERS):
+    """create many experiments or items concurrently
+
+    Keyword arguments:
+    api_client -- elabapi_python api_client instance
+    specs -- list of dicts with key 'name' and optional keys 'comment',
+             'catid' and 'entity_type' ('experiments' (default) or 'items')
+    workers -- maximum number of creations in flight
+
+    Returns:
+    results -- list of (spec, new_id, error) in the order of specs;
+               new_id is None and error is a str for rows that failed
+    """
+    def _create(spec):
+        try:
+            new_id = _create_entry(api_client, spec.get('entity_type', 'experiments'),
+                                   spec['name'], spec.get('comment', ''), spec.get('catid', 0))
+            return spec, new_id, None
+        except Exception as exc:
+            return spec, None, str(exc)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(bind(_create), specs))
+    for entity_type in {spec.get('entity_type', 'experiments') for spec in specs}:
+        invalidate_catalogue(api_client, entity_type)
+    return results
+
+USER_DIRECTORY_TTL = 3600  # seconds
+
+
+def _cached_metadata(api_client, key, fetch, ttl=METADATA_TTL):
+    # session cache for small per-instance lists, keyed (host, *key)
+    host = getattr(getattr(api_client, 'configuration', None), 'host', '')
+    cache = st.session_state.setdefault('_metadata_cache', {})
+    hit = cache.get((host, *key))
+    if hit is not None and time.monotonic() - hit[0] < ttl:
+        return hit[1]
+    value = fetch()
+    cache[(host, *key)] = (time.monotonic(), value)
+    return value
+
+
+def prime_session_caches(api_client, catalogues=None, user_directory=None, overwrite=True):
+    """store metadata fetched ahead of time (login warm-up) in the session caches
+
+    Call from the script thread once userid and team_id are in the session.
+    Omitted arguments leave their cache untouched.
+
+    Keyword arguments:
+    api_client -- elabapi_python api_client instance
+    catalogues -- {entity_type: record returned by fetch_catalogue}
+    user_directory -- directory returned by load_user_directory
+    overwrite -- if False, keep caches that are already filled
+    """
+    def _put(cache, key, value):
+        if overwrite or key not in cache:
+            cache[key] = value
+
+    catalogue = st.session_state.setdefault('_catalogue_cache', {})
+    for entity_type, fetched in (catalogues or {}).items():
+        _put(catalogue, _catalogue_key(api_client, entity_type), fetched)
+    if user_directory is not None:
+        _put(st.session_state, '_user_directory', user_directory)
+
+
+@action('load user directory')
+def get_user_directory(api_client, ttl=USER_DIRECTORY_TTL):
+    """get the user directory of the instance, loaded once per session
+
+    Keyword arguments:
+    api_client -- elabapi_python api_client instance
+    ttl -- maximum age of the cached directory in seconds
+
+    Returns:
+    directory -- dict with 'by_id' (userid → fullname) and
+                 'by_name' (fullname → userid) lookups
+    """
+    host = getattr(getattr(api_client, 'configuration', None), 'host', '')
+    cached = st.session_state.get('_user_directory')
+    if cached is not None and cached['host'] == host and time.monotonic() - cached['loaded'] < ttl:
+        return cached
+    directory = load_user_directory(api_client)
+    st.session_state['_user_directory'] = directory
+    return directory
+
+def load_user_directory(api_client):
+    """download the user directory without touching the session; see get_user_directory"""
+    now = time.monotonic()
+    users = elabapi_python.UsersApi(api_client).read_users() or []
+    return {
+        'host':    getattr(getattr(api_client, 'configuration', None), 'host', ''),
+        'loaded':  now,
+        'by_id':   {_attr(u, 'userid'): _attr(u, 'fullname') for u in users},
+        'by_name': {_attr(u, 'fullname'): _attr(u, 'userid') for u in users},
+    }
 
 def get_user_id(api_client, fn, ln):
     """get the id of the current user from name
@@ -279,13 +753,10 @@ def get_user_id(api_client, fn, ln):
     Returns:
     u.userid -- id of the user entry 
     """
-    uapi = elabapi_python.UsersApi(api_client)
-    users = uapi.read_users()
-    for u in users:
-        if _attr(u, 'fullname') == ' '.join([fn, ln]):
-            return _attr(u, 'userid')
-    print('User %s %s does not exist!' % (fn, ln))
-    return None
+    userid = get_user_directory(api_client)['by_name'].get(' '.join([fn, ln]))
+    if userid is None:
+        print('User %s %s does not exist!' % (fn, ln))
+    return userid
 
 def get_teams(api_client, userid):
     """get the ids and names of teams the current user
@@ -303,21 +774,25 @@ def get_teams(api_client, userid):
     teams = tapi.read_teams() or []
     return [_attr(t, 'id') for t in teams], [_attr(t, 'name') for t in teams]
 
-def get_categories(api_client, team_id):
+def get_categories(api_client, team_id, ttl=METADATA_TTL):
     """get all experiment categories available to 
-    a user from name
+    a team, cached per session
     
     Keyword arguments:
     api_client -- elabapi_python api_client instance
-    fn -- first name
-    ln -- last name
+    team_id -- id of the team
+    ttl -- maximum age of the cached list in seconds
      
     Returns:
     titles -- names of the categories
     ids -- ids of the categories
     colors -- colors assigned to the categories 
     """
-    
+    return _cached_metadata(api_client, ('experiments_categories', team_id),
+                            lambda: read_categories(api_client, team_id), ttl)
+
+def read_categories(api_client, team_id):
+    """download the experiment categories of a team; see get_categories"""
     eapi = elabapi_python.ExperimentsCategoriesApi(api_client)
     cats = eapi.read_team_experiments_categories(team_id)
     return [cat.title for cat in cats],[cat.id for cat in cats],[cat.color for cat in cats]
@@ -333,12 +808,7 @@ def get_name(api_client, userid):
     Returns:
     u.fullname -- name of the user
     """
-    uapi = elabapi_python.UsersApi(api_client)
-    users = uapi.read_users()
-    for u in users:
-        if _attr(u, 'userid') == userid:
-            return _attr(u, 'fullname')
-    return False
+    return get_user_directory(api_client)['by_id'].get(userid, False)
 
 # ── Log-table helpers ─────────────────────────────────────────────────────────
 # Detection is signature-based: we look for any <table> that contains the
@@ -353,19 +823,55 @@ def get_name(api_client, userid):
 _LOG_SIGNATURE = 'ISO time'   # present in all elab-app table headers; kept short to survive formatting changes
 _ROW_RE = re.compile(r'<tr[^>]*>(.*?)</tr>', re.DOTALL | re.IGNORECASE)
 _TD_RE  = re.compile(r'<td[^>]*>(.*?)</td>', re.DOTALL | re.IGNORECASE)
+_TS_CELL_RE = re.compile(r'<tr[^>]*>\s*<td[^>]*>(.*?)</td>', re.DOTALL | re.IGNORECASE)  # first cell of a data row
+_TD_OPEN_RE = re.compile(r'<td[\s>]', re.IGNORECASE)
+_TH_OPEN_RE = re.compile(r'<th[\s>]', re.IGNORECASE)
+_TABLE_OPEN_RE  = re.compile(r'<table', re.IGNORECASE)
+_TABLE_CLOSE_RE = re.compile(r'</table>', re.IGNORECASE)
 _SHORT_NAME_RE = re.compile(r'^[a-z][a-z0-9_]*$')
 # Detect elabFTW internal hrefs so we can mirror them as proper database links
 _ITEM_LINK_RE  = re.compile(r'database\.php\?mode=view&(?:amp;)?id=(\d+)', re.IGNORECASE)
 _EXP_LINK_RE   = re.compile(r'experiments\.php\?mode=view&(?:amp;)?id=(\d+)', re.IGNORECASE)
 
 
-def _create_links_from_html(api_client, entity_type, entity_id, content_html):
+# Known database links per entry, keyed (host, entity_type, entity_id) and holding
+# (linked item ids, linked experiment ids).  Refreshed from every entry read in
+# _merge_into_entry and extended as links are created, so links that already
+# exist are not POSTed again.
+_LINKS_CACHE = {}
+_links_lock = threading.Lock()
+# Background link creation runs here so the append returns right after the PATCH
+_LINK_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix='elab_links')
+
+
+def _links_key(api_client, entity_type, entity_id):
+    host = getattr(getattr(api_client, 'configuration', None), 'host', '')
+    return (host, entity_type, entity_id)
+
+
+def _remember_links(api_client, entity_type, entity_id, entry):
+    """Record the links an entry already has, as returned by get_entry."""
+    item_links = _attr(entry, 'items_links')
+    exp_links  = _attr(entry, 'experiments_links')
+    if item_links is None and exp_links is None:
+        return   # model without link fields — nothing known
+    with _links_lock:
+        _LINKS_CACHE[_links_key(api_client, entity_type, entity_id)] = (
+            {_attr(l, 'entityid') for l in item_links or []},
+            {_attr(l, 'entityid') for l in exp_links or []},
+        )
+
+
+def _create_links_from_html(api_client, entity_type, entity_id, content_html, background=False):
     """Parse content_html for elabFTW internal resource/experiment links and create
     them as proper database-level links on the entry.
 
     elabFTW's own editor does this automatically; this mirrors that behaviour for
     links inserted through elab_app.  Errors are silently ignored (e.g. the link
     already exists, or the referenced entry is not accessible).
+    Links already known to exist on the entry are skipped; the remaining ones are
+    POSTed concurrently.  With background=True the whole step runs on a worker
+    thread and the call returns immediately.
 
     Detects:
       database.php?mode=view&id=XXXX    → items_links  (resources)
@@ -374,51 +880,70 @@ def _create_links_from_html(api_client, entity_type, entity_id, content_html):
     item_ids = {int(m) for m in _ITEM_LINK_RE.findall(content_html)}
     exp_ids  = {int(m) for m in _EXP_LINK_RE.findall(content_html)}
 
-    if item_ids:
-        link_api = elabapi_python.LinksToItemsApi(api_client)
-        for item_id in item_ids:
-            try:
-                link_api.post_entity_items_links(entity_type, entity_id, item_id)
-            except Exception:
-                pass
+    key = _links_key(api_client, entity_type, entity_id)
+    with _links_lock:
+        known_items, known_exps = _LINKS_CACHE.get(key, (set(), set()))
+        item_ids -= known_items
+        exp_ids  -= known_exps
+    if not item_ids and not exp_ids:
+        return
+
+    if background:
+        _LINK_POOL.submit(bind(_post_links), api_client, entity_type, entity_id, key, item_ids, exp_ids)
+    else:
+        _post_links(api_client, entity_type, entity_id, key, item_ids, exp_ids)
+
+
+def _post_links(api_client, entity_type, entity_id, key, item_ids, exp_ids):
+    item_api = elabapi_python.LinksToItemsApi(api_client)
+    exp_api  = elabapi_python.LinksToExperimentsApi(api_client)
+
+    def _post(kind, target_id):
+        try:
+            if kind == 'items':
+                item_api.post_entity_items_links(entity_type, entity_id, target_id)
+            else:
+                exp_api.post_entity_experiments_links(entity_type, entity_id, target_id)
+        except Exception:
+            return
+        with _links_lock:
+            known = _LINKS_CACHE.setdefault(key, (set(), set()))
+            known[0 if kind == 'items' else 1].add(target_id)
 
-    if exp_ids:
-        link_api = elabapi_python.LinksToExperimentsApi(api_client)
-        for linked_exp_id in exp_ids:
-            try:
-                link_api.post_entity_experiments_links(entity_type, entity_id, linked_exp_id)
-            except Exception:
-                pass
+    jobs = [('items', i) for i in item_ids] + [('experiments', i) for i in exp_ids]
+    with ThreadPoolExecutor(max_workers=min(8, len(jobs))) as pool:
+        list(pool.map(bind(lambda job: _post(*job)), jobs))
 
 
 def _find_all_log_tables(html):
-    """Return list of (start, end) for every table containing the log signature."""
+    """Return list of (start, end) for every table containing the log signature.
+
+    Single forward pass: case-insensitive tag regexes are searched from the
+    current position (no lowered copy per step) and the signature is tested in
+    place with str.find, so the scan is linear in the size of the body.
+    """
     results = []
     pos = 0
     html = html or ''
     while True:
-        t_start = html.lower().find('<table', pos)
-        if t_start == -1:
+        m_start = _TABLE_OPEN_RE.search(html, pos)
+        if m_start is None:
             break
-        t_end = html.lower().find('</table>', t_start)
-        if t_end == -1:
+        m_end = _TABLE_CLOSE_RE.search(html, m_start.end())
+        if m_end is None:
             break
-        t_end += len('</table>')
-        if _LOG_SIGNATURE in html[t_start:t_end]:
+        t_start, t_end = m_start.start(), m_end.end()
+        if html.find(_LOG_SIGNATURE, t_start, t_end) != -1:
             results.append((t_start, t_end))
         pos = t_end
     return results
 
 
-def parse_log_rows(html):
-    """Extract data rows from a log table HTML.
-
-    Skips the identifier row and header rows (which have <th> cells, not <td>).
-    Returns a list of (timestamp_str, content_html, initials, app_version) tuples.
-    v2.x tables have 3 columns; their rows are backfilled with '2.x' as app_version.
-    """
+def _parse_rows(html, pos=0, endpos=None):
     rows = []
-    for row_match in _ROW_RE.finditer(html or ''):
+    if endpos is None:
+        endpos = len(html)
+    for row_match in _ROW_RE.finditer(html, pos, endpos):
         tds = _TD_RE.findall(row_match.group(1))
         if len(tds) == 4 and tds[0].strip() != LOG_SCHEMA_APP:
             rows.append((tds[0].strip(), tds[1].strip(), tds[2].strip(), tds[3].strip()))
@@ -427,6 +952,140 @@ def parse_log_rows(html):
     return rows
 
 
+def parse_log_rows(html):
+    """Extract data rows from a log table HTML.
+
+    Skips the identifier row and header rows (which have <th> cells, not <td>).
+    Returns a list of (timestamp_str, content_html, initials, app_version) tuples.
+    v2.x tables have 3 columns; their rows are backfilled with '2.x' as app_version.
+    """
+    return _parse_rows(html or '')
+
+
+def _parse_iso(ts):
+    try:
+        return datetime.datetime.fromisoformat(ts)
+    except ValueError:
+        return None
+
+
+class LogTable:
+    """Parsed view of every elab-app log table in one entry body.
+
+    The body is scanned once; compatibility checks, merges and exports then work
+    on these fields instead of re-running the row regexes.  Only the table spans
+    are located up front: the rows are parsed on first use, and the splice
+    check (head) reads just the first cell of each row, so a single appended
+    row that is spliced in never needs the full parse.
+
+    Attributes:
+      spans   -- list of (start, end) of each log table, in body order
+      head    -- (position, datetime, number of rows) of the head data row when
+                 a newer row can be spliced in above it, else None (see _splice_point)
+      rows    -- data rows of all tables, in body order
+      times   -- datetime per row (None where the timestamp is not ISO 8601)
+      row_set -- set of rows, for duplicate checks
+      ordered -- True if the valid timestamps are newest-first
+      n_rows  -- len(rows); taken from head while the rows are not parsed
+    """
+    __slots__ = ('spans', '_body', '_head', '_parsed')
+
+    def __init__(self, body=''):
+        self._body = body or ''
+        self.spans = _find_all_log_tables(self._body)
+        self._head = _UNKNOWN
+        self._parsed = None
+
+    @property
+    def n_tables(self):
+        return len(self.spans)
+
+    @property
+    def head(self):
+        if self._head is _UNKNOWN:
+            self._head = _splice_point(self._body, *self.spans[0]) if self.n_tables == 1 else None
+        return self._head
+
+    def _parse(self):
+        # one tuple assigned at once, so threads sharing a cached table never see half of it
+        if self._parsed is None:
+            rows = [row for s, e in self.spans for row in _parse_rows(self._body, s, e)]
+            times = [_parse_iso(row[0]) for row in rows]
+            valid = [t for t in times if t is not None]
+            self._parsed = (rows, times, set(rows), all(a >= b for a, b in zip(valid, valid[1:])))
+        return self._parsed
+
+    rows    = property(lambda self: self._parse()[0])
+    times   = property(lambda self: self._parse()[1])
+    row_set = property(lambda self: self._parse()[2])
+    ordered = property(lambda self: self._parse()[3])
+
+    @property
+    def n_rows(self):
+        if self._parsed is None and self._head not in (_UNKNOWN, None):
+            return self._head[2]
+        return len(self.rows)
+
+    def rows_between(self, from_date, to_date):
+        """Return the rows whose timestamp falls on a date in [from_date, to_date]."""
+        return [row for row, t in zip(self.rows, self.times)
+                if t is not None and from_date <= t.date() <= to_date]
+
+    def _prepended(self, body, row, ts, shift):
+        """Return the LogTable of body, which is this one with row spliced in at head."""
+        new = LogTable.__new__(LogTable)
+        new._body = body
+        (s, e), = self.spans
+        new.spans = [(s, e + shift)]
+        pos, _, n_rows = self.head
+        new._head = (pos, ts, n_rows + 1)
+        new._parsed = None
+        if self._parsed is not None:
+            rows, times, row_set, ordered = self._parsed
+            new._parsed = ([row] + rows, [ts] + times, row_set | {row}, ordered)
+        return new
+
+
+_UNKNOWN = object()   # LogTable.head not computed yet
+
+
+# Parsed log tables keyed by (entry id, body digest).  Keyed on content, so a hit
+# is always valid; bounded so exports and long sessions cannot grow it forever.
+_LOG_TABLE_CACHE = OrderedDict()
+_LOG_TABLE_CACHE_SIZE = 32
+_log_table_lock = threading.Lock()
+
+
+def _body_digest(body):
+    return hashlib.blake2b(body.encode(), digest_size=16).digest()
+
+
+def _cache_log_table(key, log):
+    with _log_table_lock:
+        _LOG_TABLE_CACHE[key] = log
+        _LOG_TABLE_CACHE.move_to_end(key)
+        while len(_LOG_TABLE_CACHE) > _LOG_TABLE_CACHE_SIZE:
+            _LOG_TABLE_CACHE.popitem(last=False)
+
+
+def get_log_table(body, entry_id=None):
+    """Return the LogTable for *body*, parsing it only on a cache miss.
+
+    entry_id is part of the cache key so identical bodies of different entries
+    do not share an entry; pass None for bodies that are not tied to an entry.
+    """
+    body = body or ''
+    key = (entry_id, _body_digest(body))
+    with _log_table_lock:
+        log = _LOG_TABLE_CACHE.get(key)
+        if log is not None:
+            _LOG_TABLE_CACHE.move_to_end(key)
+            return log
+    log = LogTable(body)
+    _cache_log_table(key, log)
+    return log
+
+
 def build_log_table(rows):
     """Build the elab-app log table HTML from a list of rows (newest first).
 
@@ -439,11 +1098,15 @@ def build_log_table(rows):
         LOG_SCHEMA_APP, LOG_SCHEMA_URL)
     header = '<tr><th>ISO time<br>(ISO 8601)</th><th>Log<br>(newest to oldest)</th><th>Initials</th><th>App<br>version</th></tr>'
     tr_blocks = [id_row, header]
-    for ts, content, initials, app_ver in rows:
-        tr_blocks.append('<tr><td>%s</td><td>%s</td><td>%s</td><td>%s</td></tr>' % (ts, content, initials, app_ver))
+    for row in rows:
+        tr_blocks.append(_build_row(row))
     return '<table>\n%s\n</table>' % '\n'.join(tr_blocks)
 
 
+def _build_row(row):
+    return '<tr><td>%s</td><td>%s</td><td>%s</td><td>%s</td></tr>' % tuple(row)
+
+
 def _merge_and_sort(existing_rows, new_rows):
     """Add new_rows to existing_rows, skip exact duplicates, sort newest first."""
     existing_set = set(existing_rows)
@@ -466,17 +1129,104 @@ def _merge_and_sort(existing_rows, new_rows):
     return existing_rows, inserted, skipped
 
 
-def _consolidate(current_content, new_rows):
+def _splice_point(html, start, end):
+    """Return (position, datetime, number of rows) of the head data row of the
+    log table html[start:end], or None unless a newer row can be spliced in.
+
+    A row can only be spliced in when the result is exactly what a full rebuild
+    would write: the table looks like one written by build_log_table (the
+    identifier row first, a 4-column header and 4 cells in every data row) and
+    every timestamp is valid ISO 8601, newest first.  A v2.x table (3 columns,
+    no identifier row, rows read back as '2.x') must go through the full merge,
+    which rebuilds it in the current layout.  Only the first cell of each row
+    is read; cells are counted, not parsed.
+    """
+    rows = _TS_CELL_RE.finditer(html, start, end)
+    id_row = next(rows, None)
+    if id_row is None or id_row.group(1).strip() != LOG_SCHEMA_APP:
+        return None
+    head = prev = prev_ts = None
+    n_rows = 0
+    for m in rows:
+        if head is None:
+            # identifier row and header: 4 <td> and 4 <th> before the head row
+            head = m
+            if len(_TH_OPEN_RE.findall(html, id_row.start(), m.start())) != 4:
+                return None
+            prev = id_row
+        # cells from the start of the previous row to the start of this one
+        if len(_TD_OPEN_RE.findall(html, prev.start(), m.start())) != 4:
+            return None
+        ts = _parse_iso(m.group(1).strip())
+        try:
+            if ts is None or (prev_ts is not None and ts > prev_ts):
+                return None   # invalid or out of order — the full merge re-sorts it
+        except TypeError:     # naive vs. timezone-aware timestamps
+            return None
+        if prev_ts is None:
+            head_ts = ts
+        prev, prev_ts = m, ts
+        n_rows += 1
+    if head is None or len(_TD_OPEN_RE.findall(html, prev.start(), end)) != 4:
+        return None
+    return head.start(), head_ts, n_rows
+
+
+def _splice_row(current_content, log, new_row):
+    """Fast path for the common append: insert new_row above the head data row.
+
+    Only taken when the only log table can take a spliced row (see
+    _splice_point) and new_row is strictly newer than the head row — then the
+    result is identical to a full rebuild and no row can be a duplicate.
+    Nothing is parsed, sorted or re-emitted.
+    Returns (new_content, new_log), or None to fall back to the full merge.
+    """
+    new_ts = _parse_iso(new_row[0])
+    if new_ts is None or log.n_tables != 1:
+        return None
+    if log._head is _UNKNOWN:
+        # a late row is rejected on the head timestamp before the whole table is scanned
+        s, e = log.spans[0]
+        first = next(itertools.islice(_TS_CELL_RE.finditer(current_content, s, e), 1, 2), None)
+        head_ts = first and _parse_iso(first.group(1).strip())
+        if head_ts is not None and new_ts <= head_ts:
+            return None
+    head = log.head
+    if head is None:
+        return None
+    head_pos, head_ts, _ = head
+    if new_ts <= head_ts:
+        return None
+    new_tr = _build_row(new_row) + '\n'
+    new_content = ''.join([current_content[:head_pos], new_tr, current_content[head_pos:]])
+    return new_content, log._prepended(new_content, new_row, new_ts, len(new_tr))
+
+
+def _consolidate(current_content, new_rows, entry_id=None):
     """Merge new_rows into existing log tables, sort newest first, return
     (new_full_content, inserted, skipped, n_tables).
 
     All log tables found are merged into one consolidated table regardless of
     which app version wrote them. Per-row versioning (app_version column) tracks
     provenance; no per-table version gating is needed.
+    A single row newer than the head of an ordered table is spliced in directly
+    (see _splice_row) instead of rebuilding the whole table; the rows are then
+    never parsed.  The LogTable comes from (and the result is stored in) the
+    LogTable cache.
     """
-    tables = _find_all_log_tables(current_content)
+    log = get_log_table(current_content, entry_id)
 
-    if not tables:
+    if len(new_rows) == 1:
+        try:
+            spliced = _splice_row(current_content, log, tuple(new_rows[0]))
+        except TypeError:   # naive vs. timezone-aware timestamps
+            spliced = None
+        if spliced is not None:
+            new_content, new_log = spliced
+            _cache_log_table((entry_id, _body_digest(new_content)), new_log)
+            return new_content, 1, 0, 1
+
+    if not log.spans:
         # No log table yet — append a new one after existing content
         all_rows, inserted, skipped = _merge_and_sort([], list(new_rows))
         new_table = build_log_table(all_rows)
@@ -484,12 +1234,7 @@ def _consolidate(current_content, new_rows):
         result = '<br>\n'.join([p for p in [before, new_table] if p])
         return result, inserted, skipped, 0
 
-    # Gather all rows from all log tables
-    all_rows = []
-    for s, e in tables:
-        all_rows.extend(parse_log_rows(current_content[s:e]))
-
-    all_rows, inserted, skipped = _merge_and_sort(all_rows, new_rows)
+    all_rows, inserted, skipped = _merge_and_sort(list(log.rows), new_rows)
     new_table = build_log_table(all_rows)
 
     # Rebuild content: replace the first log table with the consolidated one;
@@ -497,49 +1242,143 @@ def _consolidate(current_content, new_rows):
     result_parts = []
     last_pos = 0
     first_replaced = False
-    for s, e in sorted(tables):
+    for s, e in log.spans:
         result_parts.append(current_content[last_pos:s])
         if not first_replaced:
             result_parts.append(new_table)
             first_replaced = True
         last_pos = e
     result_parts.append(current_content[last_pos:])
-    return ''.join(result_parts), inserted, skipped, len(tables)
+    return ''.join(result_parts), inserted, skipped, log.n_tables
+
+
+CONFLICT_RETRIES = 5      # re-merges after a concurrent write overwrote ours
+CONFLICT_BACKOFF = 0.05   # seconds; randomised and doubled per retry
+
+
+# Appends from this app process (every session and worker thread) to one entry
+# take turns, so they cannot overwrite each other at all; the checks in
+# _merge_into_entry are left for writers elsewhere (other app instances, the
+# elabFTW editor).  Striped, so the number of locks stays fixed.
+_ENTRY_LOCKS = [threading.Lock() for _ in range(64)]
 
 
-def bulk_append_to_experiment(api_client, exp_id, new_rows, entity_type='experiments'):
+def _entry_lock(api_client, entity_type, entity_id):
+    return _ENTRY_LOCKS[hash(_links_key(api_client, entity_type, entity_id)) % len(_ENTRY_LOCKS)]
+
+
+class WriteConflictError(RuntimeError):
+    """Raised when a log write keeps getting overwritten by concurrent writers."""
+
+
+def _rows_landed(body, new_rows):
+    """True if every row of new_rows (by timestamp and initials) is in body's log table.
+
+    Content is not compared: elabFTW sanitizes body HTML, so a row can come back
+    with different markup than it was sent with.  Only the timestamp cell of
+    each row is read, and a row is parsed only when its timestamp is one of
+    ours; the log is newest-first, so the scan usually stops at the head rows.
+    """
+    missing = {(row[0], row[2]) for row in new_rows}
+    stamps = {ts for ts, _ in missing}
+    for start, end in get_log_table(body).spans:
+        for m in _TS_CELL_RE.finditer(body, start, end):
+            if m.group(1).strip() not in stamps:
+                continue
+            row = _ROW_RE.match(body, m.start(), end)
+            for ts, _, initials, _ in (_parse_rows(body, m.start(), row.end()) if row else ()):
+                missing.discard((ts, initials))
+            if not missing:
+                return True
+    return not missing
+
+
+def _merge_into_entry(api_client, exp_id, new_rows, entity_type='experiments',
+                      retries=CONFLICT_RETRIES):
+    """Read one entry by id, merge new_rows into its log table and patch it back.
+
+    Shared by every append path (single, re-send, bulk) so that a write costs one
+    GET of the target entry instead of a download of the whole entry list.
+
+    Appends to one entry from this process take turns (_entry_lock).  elabFTW
+    has no conditional PATCH, so a writer elsewhere appending to the same entry
+    at once can still overwrite our rows.  After the PATCH the entry is read
+    back and must contain every new row (by timestamp and initials); the
+    entity the PATCH answers with cannot stand in for that read, as it never
+    shows a write that lands after ours.  If a row is missing, a concurrent
+    write replaced ours: after a short randomised pause (so competing writers
+    fall out of step) the entry is read again and the rows are merged onto
+    that version, up to *retries* times.  Then WriteConflictError is raised, so
+    callers keep the rows in the offline outbox rather than report them saved.
+    A write costs three round trips (GET, PATCH, GET).  A window between the
+    read and the PATCH remains; closing it would need a conditional PATCH.
+    Returns (new_content, inserted, skipped, n_tables) as _consolidate does.
+    """
+    with _entry_lock(api_client, entity_type, exp_id):
+        return _merge_checked(api_client, exp_id, new_rows, entity_type, retries)
+
+
+def _merge_checked(api_client, exp_id, new_rows, entity_type, retries):
+    entry = get_entry(api_client, exp_id, entity_type=entity_type)
+    _remember_links(api_client, entity_type, exp_id, entry)
+    for attempt in range(retries + 1):
+        if attempt:
+            # a concurrent write replaced ours — let competing writers fall out
+            # of step, then merge again onto the newest version
+            time.sleep(random.uniform(0, CONFLICT_BACKOFF * 2 ** attempt))
+            entry = get_entry(api_client, exp_id, entity_type=entity_type)
+        new_content, inserted, skipped, n_tables = _consolidate(entry.body or '', new_rows, entry_id=exp_id)
+        patch_entry(api_client, exp_id, {'body': new_content}, entity_type=entity_type, log_rows=new_rows)
+        if _rows_landed(get_entry(api_client, exp_id, entity_type=entity_type).body or '', new_rows):
+            return new_content, inserted, skipped, n_tables
+    raise WriteConflictError(
+        f'{entity_type}/{exp_id} was written concurrently {retries + 1} times; '
+        'rows were not saved')
+
+
+def _to_outbox(api_client, exp_id, entity_type, rows, exp_name='', error=None, owner=None):
+    """Persist rows that could not be written in the offline outbox (see outbox.py)."""
+    from outbox import add_rows   # outbox imports utils
+    if owner is None:
+        owner = st.session_state.get('initials', '')
+    try:
+        add_rows(api_client, owner, exp_id, entity_type, rows, exp_name=exp_name, error=error)
+    except Exception:
+        pass   # the session log still shows the failed rows with a re-send button
+
+
+@action('bulk append')
+def bulk_append_to_experiment(api_client, exp_id, new_rows, entity_type='experiments', record=True):
     """Merge new log rows into the entry, sort newest first, skip exact duplicates.
 
     Consolidates all log tables into one.
     new_rows: list of (timestamp_str, content_html, initials, app_version)
-    Returns: (inserted_count, skipped_count)
+    record: if True, add the rows to the session log and store them in the
+            offline outbox when the write fails (the outbox replay passes False)
+    Returns: (inserted_count, skipped_count, error) — error is None on success
     """
     _failed  = False
     _error   = None
     inserted = 0
     skipped  = 0
     try:
-        if entity_type == 'items':
-            names, ids, entries = get_items(api_client)
-        else:
-            names, ids, entries = get_experiments(api_client)
-        current_content = entries[ids.index(exp_id)].body or ''
+        _, inserted, skipped, _ = _merge_into_entry(
+            api_client, exp_id, new_rows, entity_type=entity_type)
 
-        new_content, inserted, skipped, _ = _consolidate(current_content, new_rows)
-
-        if entity_type == 'items':
-            elabapi_python.ItemsApi(api_client).patch_item(body={'body': new_content}, id=exp_id)
-        else:
-            elabapi_python.ExperimentsApi(api_client).patch_experiment(body={'body': new_content}, id=exp_id)
+        # mirror internal links of every row as database links (deduplicated across rows)
+        _create_links_from_html(api_client, entity_type, exp_id,
+                                '\n'.join(row[1] for row in new_rows), background=True)
     except Exception as exc:
         _failed = True
         _error  = str(exc)
 
     # always record rows in session log (failed rows appear in red with re-send button)
-    if inserted > 0 or _failed:
+    if record and (inserted > 0 or _failed):
         if 'session_log' not in st.session_state:
             st.session_state['session_log'] = []
         exp_name = st.session_state.get('exp_name', str(exp_id))
+        if _failed:
+            _to_outbox(api_client, exp_id, entity_type, new_rows, exp_name, _error)
         rows_to_log = new_rows if _failed else new_rows[:inserted + skipped]
         for ts, content_html, inits, *_ in rows_to_log:
             st.session_state['session_log'].append({
@@ -558,7 +1397,7 @@ def bulk_append_to_experiment(api_client, exp_id, new_rows, entity_type='experim
     return inserted, skipped, _error
 
 
-def check_log_compatibility(body):
+def check_log_compatibility(body, entry_id=None):
     """Check whether an entry body is compatible with the elab-app log format.
 
     Returns a dict with:
@@ -568,23 +1407,17 @@ def check_log_compatibility(body):
       ordered  -- bool, True if timestamps are newest-first
       n_tables -- number of log tables found (>1 → needs consolidation)
     """
-    body = body or ''
-    tables = _find_all_log_tables(body)
+    log = get_log_table(body, entry_id)
 
-    if not tables:
+    if not log.spans:
         return {'status': 'no_table', 'rows': [], 'bad_rows': [], 'ordered': True,
                 'n_tables': 0}
 
-    rows = []
-    for s, e in tables:
-        rows.extend(parse_log_rows(body[s:e]))
-
+    rows = log.rows
     bad_rows = []
-    for i, (ts, content, initials, app_ver) in enumerate(rows, start=1):
+    for i, ((ts, content, initials, app_ver), t) in enumerate(zip(rows, log.times), start=1):
         reasons = []
-        try:
-            datetime.datetime.fromisoformat(ts)
-        except ValueError:
+        if t is None:
             reasons.append(f"timestamp '{ts}' is not valid ISO 8601")
         if not content.strip():
             reasons.append("log text is empty")
@@ -593,23 +1426,15 @@ def check_log_compatibility(body):
         if reasons:
             bad_rows.append((i, (ts, content, initials, app_ver), '; '.join(reasons)))
 
-    valid_ts = []
-    for ts, _, _, _ in rows:
-        try:
-            valid_ts.append(datetime.datetime.fromisoformat(ts))
-        except ValueError:
-            pass
-    ordered = valid_ts == sorted(valid_ts, reverse=True)
-
     if bad_rows:
         status = 'warnings'
-    elif len(tables) > 1 or not ordered:
+    elif log.n_tables > 1 or not log.ordered:
         status = 'unordered'
     else:
         status = 'ok'
 
     return {'status': status, 'rows': rows, 'bad_rows': bad_rows,
-            'ordered': ordered, 'n_tables': len(tables)}
+            'ordered': log.ordered, 'n_tables': log.n_tables}
 
 
 def get_exp_info(api_client, exp):
@@ -0,0 +1,70 @@
+"""warmup.py — Concurrent fetch of login-time metadata.
+
+As soon as the PIN is accepted, ``LoginWarmup(api_key)`` fetches everything
+the first page renders need in parallel on the shared, pooled client: the
+user's own record (``users/me``, which carries their teams), the user
+directory and the experiment and resource catalogues.  ``store()`` waits
+briefly for the results and puts them in the session caches
+(utils.prime_session_caches), so the first "Open" page renders from memory.
+
+Only ``user_info()`` is required for the login; every other fetch is best
+effort.  The login waits at most WARMUP_WAIT for them; whatever is still
+running is stored by a later ``store(timeout=0)`` on the next reruns unless
+the page has fetched it on demand in the meantime, and a fetch that failed is
+simply left to the page.
+"""
+
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from auth import fetch_user_info, get_api_client
+from metrics import action, bind
+from utils import fetch_catalogue, load_user_directory, prime_session_caches
+
+WARMUP_WORKERS = 6
+WARMUP_WAIT = 1.5    # seconds the login waits for the optional fetches
+
+_POOL = ThreadPoolExecutor(max_workers=WARMUP_WORKERS, thread_name_prefix='elab_warmup')
+
+
+class LoginWarmup:
+    """Login-time fetches running in the background for one API key."""
+
+    def __init__(self, api_key):
+        self.api_client = get_api_client(api_key)
+        with action('login warm-up'):
+            self.me = _POOL.submit(bind(fetch_user_info), api_key)
+            self.jobs = {
+                'user_directory': _POOL.submit(bind(load_user_directory), self.api_client),
+                'experiments':    _POOL.submit(bind(fetch_catalogue), self.api_client, 'experiments'),
+                'items':          _POOL.submit(bind(fetch_catalogue), self.api_client, 'items'),
+            }
+
+    def user_info(self):
+        """Return fetch_user_info's result; raises what it raised."""
+        return self.me.result()
+
+    def store(self, timeout=WARMUP_WAIT):
+        """Wait up to *timeout* seconds, then put the finished results in the session caches.
+
+        Call from the script thread after userid and team_id are in the session.
+        Only caches the page has not filled on demand are set; stored and
+        failed fetches are dropped.  Returns True once nothing is left to store.
+        """
+        wait(list(self.jobs.values()), timeout=timeout)
+
+        def take(futures, key):
+            # result of a finished fetch, removed from *futures*; None if unfinished or failed
+            future = futures.get(key)
+            if future is None or not future.done():
+                return None
+            del futures[key]
+            return future.result() if future.exception() is None else None
+
+        catalogues = {t: take(self.jobs, t) for t in ('experiments', 'items')}
+        prime_session_caches(
+            self.api_client,
+            catalogues={t: fetched for t, fetched in catalogues.items() if fetched is not None},
+            user_directory=take(self.jobs, 'user_directory'),
+            overwrite=False,
+        )
+        return not self.jobs
@@ -0,0 +1,163 @@
+"""writer.py — Per-session write-behind queue for log appends.
+
+``append_to_experiment(..., background=True)`` hands its row to the session's
+LogWriter and returns immediately instead of blocking the Streamlit script on
+GET + PATCH + link POSTs.  A daemon thread drains the queue; rows that pile up
+for the same entry while a write is in flight are merged in one
+``_merge_into_entry`` call (one GET, one consolidation, one PATCH).  The thread
+is started by submit() and exits after IDLE_TIMEOUT seconds without work, so
+sessions that ended (or logged out) do not keep a thread parked forever.
+
+Progress is reported through the ``session_log`` records that
+append_to_experiment creates: the writer flips ``pending`` off and fills in
+``failed``/``error``/``total_rows`` in place, and the Session History on the
+"Add text logs" page re-renders itself while any of them is pending.  Rows of a failed
+write are also stored in the offline outbox (outbox.py).
+"""
+
+import queue
+import threading
+import time
+
+import streamlit as st
+
+from metrics import action
+from utils import _merge_into_entry, _create_links_from_html, _to_outbox, get_log_table
+
+COALESCE_DELAY = 0.25  # seconds to wait for more rows before writing a batch
+CLOSE_TIMEOUT = 5      # seconds get_log_writer waits for a replaced writer to drain
+IDLE_TIMEOUT = 60      # seconds the thread waits for new rows before exiting
+
+_STOP = object()       # queued by close(): write what came before, then exit
+
+
+class LogWriter:
+    """Background thread that writes queued log rows to elabFTW."""
+
+    def __init__(self, api_client, owner=''):
+        self.api_client = api_client
+        self.owner = owner
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()   # guards _running against the idle exit
+        self._running = False
+        self._thread = None
+
+    def is_alive(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def pending(self):
+        """Number of rows accepted but not yet written."""
+        return self._queue.unfinished_tasks
+
+    def submit(self, exp_id, entity_type, row, record):
+        """Queue *row* for entry *exp_id*; *record* is its session_log dict."""
+        record['pending'] = True
+        with self._lock:
+            self._queue.put((exp_id, entity_type, row, record))
+            if not self._running:
+                self._running = True
+                self._thread = threading.Thread(target=self._run, name='elab_log_writer', daemon=True)
+                self._thread.start()
+
+    def flush(self, timeout=None):
+        """Block until every queued row has been written (or *timeout* expires).
+
+        Returns True if the queue drained in time.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def close(self, timeout=None):
+        """Stop the thread once the rows queued so far are written.
+
+        Blocks until they are (or *timeout* expires); the thread finishes them
+        either way.  Returns True if the queue drained in time.
+        """
+        with self._lock:
+            if not self._running:
+                return True
+            self._queue.put(_STOP)
+        return self.flush(timeout)
+
+    def _run(self):
+        stop = False
+        while not stop:
+            try:
+                batch = [self._queue.get(timeout=IDLE_TIMEOUT)]
+            except queue.Empty:
+                with self._lock:
+                    # submit() puts under the same lock, so nothing can slip
+                    # in between this check and the exit
+                    if self._queue.empty():
+                        self._running = False
+                        return
+                continue
+            time.sleep(COALESCE_DELAY)
+            while batch[-1] is not _STOP:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if batch[-1] is _STOP:
+                batch.pop()
+                with self._lock:
+                    # rows submitted after close() still need this thread
+                    stop = self._queue.empty()
+                    self._running = not stop
+                self._queue.task_done()
+
+            # group by entry, keeping arrival order
+            groups = {}
+            for exp_id, entity_type, row, record in batch:
+                groups.setdefault((entity_type, exp_id), []).append((row, record))
+
+            for (entity_type, exp_id), items in groups.items():
+                try:
+                    self._write(exp_id, entity_type, items)
+                finally:
+                    for _ in items:
+                        self._queue.task_done()
+
+    @action('write-behind append')
+    def _write(self, exp_id, entity_type, items):
+        rows = [row for row, _ in items]
+        try:
+            new_content, _, _, n_tables = _merge_into_entry(
+                self.api_client, exp_id, rows, entity_type=entity_type)
+            total_rows = get_log_table(new_content, exp_id).n_rows
+            failed, error = False, None
+        except Exception as exc:
+            n_tables = total_rows = 0
+            failed, error = True, str(exc)
+
+        for row, record in items:
+            record.update(pending=False, failed=failed, error=error,
+                          n_tables=n_tables, total_rows=total_rows)
+        if failed:
+            _to_outbox(self.api_client, exp_id, entity_type, rows,
+                       items[0][1].get('exp_name', ''), error, owner=self.owner)
+        else:
+            for row, _ in items:
+                # mirror any elabFTW internal links in the log text as database links
+                _create_links_from_html(self.api_client, entity_type, exp_id, row[1])
+
+
+def get_log_writer(api_client):
+    """Return this session's LogWriter, creating it on first use.
+
+    The writer starts its thread when rows are submitted and lets it exit when
+    idle.  A writer bound to another client (e.g. after logging in again) is
+    closed: its queued rows are still written with the client they were
+    queued for.
+    """
+    writer = st.session_state.get('_log_writer')
+    if writer is None or writer.api_client is not api_client:
+        if writer is not None:
+            writer.close(timeout=CLOSE_TIMEOUT)
+        writer = LogWriter(api_client, owner=st.session_state.get('initials', ''))
+        st.session_state['_log_writer'] = writer
+    return writer